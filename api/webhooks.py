@@ -76,6 +76,9 @@ async def debug_status():
     """
     # Import diferido: al importarse, bots.discord_bot arranca el cliente de Discord.
     from bots.discord_bot import STATUS
+    from services import file_cache, download_queue, singleflight, video_reencode, prefetch
+    from services import startup_metrics, strategy_health, cookies, job_journal, ranged_download
+    from services import disk_janitor, progress, canonical, probe_cache, ydl_pool, fragment_budget
 
     diagnostico = []
     if not STATUS["discord_ready"]:
@@ -106,12 +109,30 @@ async def debug_status():
         "instance_id": INSTANCE_ID,
         "uptime_seconds": int(time.time() - STARTED_AT),
         "bot_ids": _bot_ids(),
+        "startup": startup_metrics.stats(),
         "tokens_duplicados": duplicados,
         "pista_instancias": (
             "Recarga esta página varias veces: si instance_id CAMBIA, hay más de un "
             "proceso corriendo y esa es la causa del error 409 de Telegram."
         ),
         "diagnostico": diagnostico,
+        "monkey_descargar": {
+            "file_cache": file_cache.stats(),
+            "download_queues": download_queue.stats(),
+            "singleflight": singleflight.stats(),
+            "reencode": video_reencode.stats(),
+            "prefetch": prefetch.stats(),
+            "strategy_health": strategy_health.stats(),
+            "cookies": cookies.stats(),
+            "job_journal": job_journal.stats(),
+            "ranged_downloads": ranged_download.stats(),
+            "disk": disk_janitor.stats(),
+            "progress": progress.stats(),
+            "canonical": canonical.stats(),
+            "probe_cache": probe_cache.stats(),
+            "ytdlp_instances": ydl_pool.stats(),
+            "fragments": fragment_budget.stats(),
+        },
     }
 
 
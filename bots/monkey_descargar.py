@@ -6,19 +6,39 @@ envía un link, debe aceptar que el Monkey tiene la razón antes de poder descar
 import os
 import re
 import time
+import threading
+from types import SimpleNamespace
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 import telebot
-from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, InputMediaVideo
+from telebot.types import (
+    InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, InputMediaVideo, InputMediaAudio
+)
 
-from config import MONKEY_TELEGRAM_TOKEN, IG_USERNAME, IG_COOKIES_RAW
+from config import (
+    MONKEY_TELEGRAM_TOKEN, IG_USERNAME,
+    MONKEY_DOWNLOAD_WORKERS, MONKEY_DOWNLOAD_QUEUE_MAX, MONKEY_UPLOAD_CONCURRENCIA,
+    MONKEY_UPLOAD_STAGING_CHAT,
+    MONKEY_PREFETCH, MONKEY_PREFETCH_TTL_SECONDS, MONKEY_PREFETCH_MAX_MB, MONKEY_PREFETCH_WORKERS,
+    MONKEY_JOB_JOURNAL, MONKEY_JOB_MAX_ATTEMPTS, MONKEY_PROGRESS_INTERVAL_SECONDS,
+)
 from services.downloader import (
-    descargar_media, detectar_plataforma, IL, IG_TEST_URL
+    descargar_media, detectar_plataforma, clave_media, extraer_urls, liberar_archivos,
+    asegurar_sesion_instagram, cookies_instagram, IL, IG_TEST_URL
 )
 from services.user_store import has_accepted, mark_accepted, remove_accepted
+from services import file_cache
+from services import telegram_upload
+from services import job_journal
+from services.download_queue import DownloadQueue
+from services.singleflight import SingleFlight
+from services.prefetch import SpeculativePrefetch
+from services.progress import ProgressReporter
 
 monkey_bot = telebot.TeleBot(MONKEY_TELEGRAM_TOKEN)
 
-# Links pendientes de aceptación: {user_id: {"url": str, "chat_id": int}}
+# Links pendientes de aceptación: {user_id: {"url": str, "chat_id": int, "job_id": str, "modo": str}}
 pending_links = {}
 
 # Redes soportadas
@@ -27,7 +47,7 @@ REDES_SOPORTADAS = [
     "tiktok.com",
     "instagram.com",
     "facebook.com", "fb.watch", "fb.gg",
-    "x.com", "twitter.com",
+    "x.com", "twitter.com", "t.co",
 ]
 
 EMOJI_PLATAFORMA = {
@@ -44,6 +64,41 @@ MAX_MB_POR_LOTE = 40
 # videos/carruseles y causa "The write operation timed out")
 UPLOAD_TIMEOUT = 300
 REINTENTOS_ENVIO = 3
+# Links de un mismo mensaje que se procesan como lote (el resto se ignora)
+MAX_LINKS_POR_MENSAJE = 10
+
+# Las descargas corren en workers propios: el hilo del handler de telebot
+# vuelve enseguida y un video lento no bloquea a los demás usuarios.
+cola_descargas = DownloadQueue("monkey_descargas", MONKEY_DOWNLOAD_WORKERS, MONKEY_DOWNLOAD_QUEUE_MAX)
+
+# Subidas de lotes de un mismo carrusel en paralelo al chat de staging (con tope por chat)
+_pool_subidas = ThreadPoolExecutor(
+    max_workers=max(1, MONKEY_DOWNLOAD_WORKERS * MONKEY_UPLOAD_CONCURRENCIA),
+    thread_name_prefix="monkey-subidas",
+)
+_semaforos_chat = {}   # chat_id -> [semáforo, subidas en curso o esperando]
+_semaforos_chat_lock = threading.Lock()
+
+# Mismo link pegado por varios a la vez → una sola descarga compartida. Los
+# archivos se borran cuando el último trabajo que los usa termina de enviarlos.
+vuelos_descarga = SingleFlight(
+    "monkey_descargas",
+    cleanup=lambda resultado: liberar_archivos(resultado[1]),
+    reusable=lambda resultado: bool(resultado[1]),
+)
+
+# Mientras un usuario nuevo está en la puerta de aceptación, su link ya se va
+# descargando; al aceptar, _procesar_descarga toma ese resultado.
+prefetch_descargas = SpeculativePrefetch(
+    "monkey_descargas",
+    workers=MONKEY_PREFETCH_WORKERS,
+    ttl_seconds=MONKEY_PREFETCH_TTL_SECONDS,
+    max_bytes=MONKEY_PREFETCH_MAX_MB * 1024 * 1024,
+)
+
+# Avance de cada descarga (por url_key, así lo ven todos los que comparten el
+# vuelo) para editar el mensaje de espera sin pasarse del rate limit de Telegram.
+progreso_descargas = ProgressReporter("monkey_descargas", MONKEY_PROGRESS_INTERVAL_SECONDS)
 
 
 # =============================================
@@ -81,16 +136,15 @@ def monkey_test_ig(message):
     lineas.append("🔍 **Diagnóstico de Instagram**\n")
 
     # 1) Cookies
-    from config import IG_COOKIES_RAW as _ig_cookies
-    from services.downloader import IG_COOKIES_FILE
-
-    if _ig_cookies:
-        lineas.append(f"✅ `IG_COOKIES` configurado ({len(_ig_cookies)} chars)")
-        if IG_COOKIES_FILE and os.path.exists(IG_COOKIES_FILE):
-            size = os.path.getsize(IG_COOKIES_FILE)
-            lineas.append(f"✅ Archivo `instagram_cookies.txt` existe ({size} bytes)")
+    if cookies_instagram.configured():
+        info_cookies = cookies_instagram.stats()
+        origen = "`IG_COOKIES_PATH`" if info_cookies["source"] == "file" else "`IG_COOKIES`"
+        lineas.append(f"✅ Cookies cargadas desde {origen} ({info_cookies['cookies']} cookies, "
+                      f"versión {info_cookies['version']})")
+        if cookies_instagram.get('sessionid'):
+            lineas.append("✅ Las cookies incluyen `sessionid`")
         else:
-            lineas.append("❌ Archivo `instagram_cookies.txt` no se pudo escribir")
+            lineas.append("❌ Las cookies NO incluyen `sessionid`")
     else:
         lineas.append("❌ `IG_COOKIES` NO configurado")
 
@@ -98,6 +152,7 @@ def monkey_test_ig(message):
     from config import IG_USERNAME as _ig_user, IG_PASSWORD as _ig_pass
     if _ig_user and _ig_pass:
         lineas.append(f"✅ `IG_USERNAME` = `{_ig_user[:3]}***` configurado")
+        asegurar_sesion_instagram()
         if IL.context.is_logged_in:
             lineas.append(f"✅ instaloader logueado como `{IL.context.username}`")
         else:
@@ -110,11 +165,7 @@ def monkey_test_ig(message):
     try:
         info, archivos, err = descargar_media(IG_TEST_URL, max_reintentos=0)
         if archivos:
-            for arch in archivos:
-                try:
-                    os.remove(arch)
-                except:
-                    pass
+            liberar_archivos(archivos)
             lineas.append("✅ Reel público descargado correctamente")
             lineas.append("   → yt-dlp e instaloader funcionan con la config actual")
         elif err:
@@ -169,7 +220,8 @@ def callback_monkey_accept(call):
         monkey_bot.answer_callback_query(call.id, "🐵 ¡El Monkey te lo agradece!")
 
         # Procesar la descarga
-        _procesar_descarga(chat_id, url, user_id)
+        _encolar_mensaje(chat_id, url, user_id, job_id=link_data.get("job_id"),
+                         modo=link_data.get("modo", "video"))
     else:
         monkey_bot.answer_callback_query(call.id, "🐵 ¡Aceptado! Ahora envía un link.")
         monkey_bot.send_message(
@@ -181,18 +233,55 @@ def callback_monkey_accept(call):
 # =============================================
 # HANDLER PRINCIPAL: Mensajes con links
 # =============================================
-@monkey_bot.message_handler(func=lambda msg: True, content_types=['text'])
+def _links_del_mensaje(message):
+    """Links soportados del texto o del caption (incluye los links ocultos en
+    texto con formato), hasta MAX_LINKS_POR_MENSAJE."""
+    texto = message.text or message.caption or ''
+    entidades = message.entities or message.caption_entities or []
+    ocultos = ' '.join(e.url for e in entidades if e.type == 'text_link' and e.url)
+    return extraer_urls(f"{texto} {ocultos}", REDES_SOPORTADAS)[:MAX_LINKS_POR_MENSAJE]
+
+
+# =============================================
+# COMANDO: /audio
+# =============================================
+@monkey_bot.message_handler(commands=['audio'])
+def monkey_audio(message):
+    """/audio <link> (o respondiendo a un mensaje con links): manda solo el
+    audio, sin bajar ni subir el video."""
+    links = _links_del_mensaje(message)
+    if not links and message.reply_to_message:
+        links = _links_del_mensaje(message.reply_to_message)
+    if not links:
+        monkey_bot.reply_to(
+            message,
+            "🎧 Envía /audio seguido del link (o responde con /audio a un mensaje que tenga el link) "
+            "y el Monkey te manda solo el audio."
+        )
+        return
+    _procesar_links(message, links, "audio")
+
+
+@monkey_bot.message_handler(func=lambda msg: True,
+                            content_types=['text', 'photo', 'video', 'animation', 'document'])
 def monkey_procesar_mensaje(message):
     """Handler principal del bot descargador."""
-    texto = message.text.strip()
+    links = _links_del_mensaje(message)
+    if not links:
+        return  # No hay links soportados, ignorar
+    _procesar_links(message, links, "video")
+
+
+def _procesar_links(message, links, modo):
+    """Puerta de aceptación y encolado de los links de un mensaje.
+    `modo` es "video" (lo normal) o "audio" (comando /audio)."""
     chat_id = message.chat.id
     user_id = message.from_user.id
 
-    if not any(red in texto.lower() for red in REDES_SOPORTADAS):
-        return  # No es un link soportado, ignorar
-
     # YouTube Community Posts no son videos, yt-dlp no los soporta
-    if re.search(r'youtube\.com/post/', texto.lower()):
+    posts = [l for l in links if re.search(r'youtube\.com/post/', l.lower())]
+    links = [l for l in links if l not in posts]
+    if not links:
         monkey_bot.reply_to(
             message,
             "⚠️ Ese es un **Community Post** de YouTube (texto/imágenes), no un video. "
@@ -200,15 +289,22 @@ def monkey_procesar_mensaje(message):
             parse_mode='Markdown'
         )
         return
+    # Los links viajan separados por saltos de línea (pending_links, bitácora)
+    texto = "\n".join(links)
 
     # =============================================
     # PUERTA DE ACEPTACIÓN DEL MONKEY
     # =============================================
     if not has_accepted(user_id):
-        # Guardar el link pendiente
+        # Guardar el link pendiente (también en la bitácora: sobrevive a un redeploy)
+        anterior = pending_links.get(user_id)
+        if anterior:
+            job_journal.terminar(anterior.get("job_id"))
         pending_links[user_id] = {
             "url": texto,
             "chat_id": chat_id,
+            "job_id": job_journal.registrar(chat_id, user_id, texto, "pending_accept", modo=modo),
+            "modo": modo,
         }
 
         # Enviar mensaje de aceptación con botón
@@ -224,112 +320,535 @@ def monkey_procesar_mensaje(message):
             reply_markup=markup,
             parse_mode='Markdown'
         )
+
+        # Adelantar la descarga (del primer link) mientras el usuario lee y decide
+        if MONKEY_PREFETCH:
+            primero = links[0]
+            prefetch_descargas.start(user_id, _clave_prefetch(primero, modo),
+                                     lambda: _descargar_compartido(primero, modo))
         return
 
     # =============================================
     # DESCARGA NORMAL (ya aceptó)
     # =============================================
-    _procesar_descarga(chat_id, texto, user_id)
+    _encolar_mensaje(chat_id, texto, user_id, modo=modo)
 
 
 # =============================================
-# FUNCIÓN INTERNA: Procesar descarga
+# FUNCIÓN INTERNA: Encolar descarga
 # =============================================
-def _procesar_descarga(chat_id, texto, user_id):
-    """Procesa la descarga de un link. Se usa tanto desde el handler principal
-    como desde el callback de aceptación."""
-    plataforma = detectar_plataforma(texto)
+def _texto_descargando(plataforma, modo="video"):
     emoji = EMOJI_PLATAFORMA.get(plataforma, '🔗')
+    if modo == "audio":
+        return f"🎧 Monkey sacando el audio de {plataforma.capitalize()}... dame un monkey momento."
+    return f"{emoji} Monkey Descargando de {plataforma.capitalize()} en monkey HD... dame un monkey momento."
+
+
+def _con_modo(clave, modo):
+    # El audio es otro resultado que el video del mismo link
+    return clave if modo == "video" else f"{clave}#{modo}"
 
-    msg_espera = monkey_bot.send_message(
-        chat_id,
-        f"{emoji} Monkey Descargando de {plataforma.capitalize()} en monkey HD... dame un monkey momento."
+
+def _clave(texto, modo):
+    """Clave de la media para la caché de file_id, el single-flight y el
+    progreso. Puede expandir un link corto (red): solo desde un worker."""
+    return _con_modo(clave_media(texto), modo)
+
+
+def _clave_prefetch(texto, modo):
+    """Clave del prefetch: el link tal cual llegó. Se arma en el hilo del
+    handler, que no puede esperar a expandir links cortos; al aceptar, el link
+    vuelve idéntico desde pending_links."""
+    return _con_modo(texto, modo)
+
+
+def _resumen_progreso(datos):
+    """'42% · 12.3/29.0 MB · 1.8 MB/s · ~9s' con lo que se conozca del avance."""
+    mb = 1024 * 1024
+    partes = []
+    if datos.get("percent") is not None:
+        partes.append(f"{datos['percent']:.0f}%")
+    if datos.get("total"):
+        partes.append(f"{datos['downloaded'] / mb:.1f}/{datos['total'] / mb:.1f} MB")
+    else:
+        partes.append(f"{datos['downloaded'] / mb:.1f} MB")
+    if datos.get("speed"):
+        partes.append(f"{datos['speed'] / mb:.1f} MB/s")
+    if datos.get("eta") is not None:
+        eta = int(datos["eta"])
+        partes.append(f"~{eta // 60}m{eta % 60:02d}s" if eta >= 60 else f"~{eta}s")
+    return " · ".join(partes)
+
+
+def _seguir_progreso(chat_id, texto, modo, callback):
+    """Suscribe `callback(datos)` al avance de la descarga de `texto`. Retorna el
+    token para progreso_descargas.unsubscribe (None si el progreso está apagado)."""
+    return progreso_descargas.subscribe(_clave(texto, modo), chat_id, callback)
+
+
+def _encolar_mensaje(chat_id, texto, user_id, job_id=None, msg_espera=None, modo="video"):
+    """Encola los links de `texto`: uno solo va por _encolar_descarga, varios
+    como un lote con un único mensaje de estado."""
+    links = extraer_urls(texto, REDES_SOPORTADAS) or [texto]
+    if len(links) == 1:
+        _encolar_descarga(chat_id, links[0], user_id, job_id=job_id, msg_espera=msg_espera, modo=modo)
+    else:
+        _encolar_lote(chat_id, links, user_id, job_id=job_id, msg_espera=msg_espera, modo=modo)
+
+
+def _encolar_descarga(chat_id, texto, user_id, job_id=None, msg_espera=None, modo="video"):
+    """Manda el mensaje de espera y deja la descarga en la cola de workers.
+    Se usa desde el handler principal, el callback de aceptación y al retomar
+    trabajos de un deploy anterior (que ya traen job_id y mensaje de espera);
+    vuelve enseguida, sin esperar a que termine la descarga."""
+    plataforma = detectar_plataforma(texto)
+    if msg_espera is None:
+        msg_espera = monkey_bot.send_message(chat_id, _texto_descargando(plataforma, modo))
+    if job_id is None:
+        job_id = job_journal.registrar(chat_id, user_id, texto, "queued", msg_espera.message_id, modo=modo)
+    else:
+        job_journal.actualizar(job_id, "queued", msg_espera.message_id)
+
+    # El worker puede avisar un cambio de posición antes de que este hilo edite
+    # la posición inicial: el lock evita pisar un aviso más nuevo con uno viejo.
+    aviso = {"lock": threading.Lock(), "avisado": False}
+
+    def _avisar_posicion(posicion, inicial=False):
+        with aviso["lock"]:
+            if inicial and aviso["avisado"]:
+                return
+            aviso["avisado"] = True
+            if posicion > 0:
+                texto_fila = (f"⏳ Eres el #{posicion} en la fila del Monkey. "
+                              "Tu descarga empieza en cuanto se libere un lugar.")
+            else:
+                texto_fila = _texto_descargando(plataforma, modo)
+            monkey_bot.edit_message_text(texto_fila, chat_id, msg_espera.message_id)
+
+    posicion = cola_descargas.submit(
+        lambda: _procesar_descarga(chat_id, texto, user_id, msg_espera, job_id, modo),
+        on_position=_avisar_posicion,
     )
+    if posicion is None:
+        job_journal.terminar(job_id)
+        try:
+            monkey_bot.edit_message_text(
+                "🐵 El Monkey está saturado de descargas ahora mismo. "
+                "Intenta enviar el link de nuevo en unos minutos.",
+                chat_id, msg_espera.message_id
+            )
+        except:
+            pass
+    elif posicion > 0:
+        try:
+            _avisar_posicion(posicion, inicial=True)
+        except:
+            pass
+
 
-    # ---- FASE 1: DESCARGA ----
+# =============================================
+# LOTES: varios links en un mismo mensaje
+# =============================================
+class _LoteLinks:
+    """Un mensaje con varios links. Las descargas corren en paralelo en
+    cola_descargas (con sus mismos topes), pero los envíos salen en el orden de
+    los links: cada uno se entrega cuando ya se entregaron todos los anteriores.
+    Un único mensaje de estado muestra cómo va cada link."""
+
+    def __init__(self, chat_id, links, job_id, modo="video"):
+        self.chat_id = chat_id
+        self.links = links
+        self.job_id = job_id
+        self.modo = modo
+        self.msg_estado = None
+        self._lineas = ["⏳ en la fila"] * len(links)
+        self._empezados = set()
+        self._listos = {}          # índice -> entregar() que retorna (enviado, aviso)
+        self._siguiente = 0
+        self._entregando = False
+        self._enviados = 0
+        self._lock = threading.Lock()
+        self._edit_lock = threading.Lock()
+        self._ultimo_texto = None
+
+    # ---- Avances de cada link ----
+    def en_fila(self, i, posicion):
+        with self._lock:
+            if i in self._empezados:
+                return
+            self._lineas[i] = f"⏳ #{posicion} en la fila"
+        self._refrescar()
+
+    def empezo(self, i):
+        with self._lock:
+            primero = not self._empezados
+            self._empezados.add(i)
+            self._lineas[i] = "⬇️ descargando"
+        if primero:
+            job_journal.actualizar(self.job_id, "downloading")
+        self._refrescar()
+
+    def progreso(self, i, datos):
+        with self._lock:
+            # Solo mientras descarga: no pisar "enviando" ni el resultado
+            if i in self._listos or not self._lineas[i].startswith("⬇️ "):
+                return
+            self._lineas[i] = f"⬇️ {_resumen_progreso(datos)}"
+        self._refrescar()
+
+    def listo(self, i, entregar):
+        """La descarga del link i terminó (bien o mal); `entregar()` lo envía."""
+        with self._lock:
+            self._empezados.add(i)
+            self._listos[i] = entregar
+        self._drenar()
+
+    # ---- Internos ----
+    def _drenar(self):
+        # Un solo hilo entrega a la vez, siempre el siguiente en orden; los que
+        # terminan antes esperan acá sin ocupar un worker de descarga
+        while True:
+            with self._lock:
+                if self._entregando or self._siguiente not in self._listos:
+                    return
+                i = self._siguiente
+                entregar = self._listos.pop(i)
+                self._entregando = True
+                self._lineas[i] = "📤 enviando"
+            self._refrescar()
+            try:
+                enviado, aviso = entregar()
+            except Exception as e:
+                enviado, aviso = False, f"❌ {e}"
+            with self._lock:
+                if enviado:
+                    self._enviados += 1
+                    self._lineas[i] = "⚠️ enviado a medias" if aviso else "✅ enviado"
+                else:
+                    self._lineas[i] = _resumen_aviso(aviso)
+                self._siguiente += 1
+                self._entregando = False
+                terminado = self._siguiente == len(self.links)
+            if terminado:
+                self._terminar()
+                return
+            self._refrescar()
+
+    def texto(self):
+        with self._lock:
+            if self._siguiente == len(self.links):
+                cabecera = f"📦 Listo: {self._enviados} de {len(self.links)} links enviados."
+            else:
+                que = "el audio de " if self.modo == "audio" else ""
+                cabecera = f"📦 Monkey descargando {que}{len(self.links)} links... dame un monkey momento."
+            lineas = [
+                f"{n}. {EMOJI_PLATAFORMA.get(detectar_plataforma(link), '🔗')} {linea}"
+                for n, (link, linea) in enumerate(zip(self.links, self._lineas), start=1)
+            ]
+        return cabecera + "\n" + "\n".join(lineas)
+
+    def _refrescar(self):
+        if self.msg_estado is None:
+            return
+        with self._edit_lock:
+            texto = self.texto()
+            if texto == self._ultimo_texto:
+                return
+            self._ultimo_texto = texto
+            try:
+                monkey_bot.edit_message_text(texto, self.chat_id, self.msg_estado.message_id)
+            except:
+                pass
+
+    def _terminar(self):
+        job_journal.terminar(self.job_id)
+        if self._enviados == len(self.links):
+            # Todo salió: el estado ya no aporta nada, igual que con un solo link
+            try:
+                monkey_bot.delete_message(self.chat_id, self.msg_estado.message_id)
+            except:
+                pass
+        else:
+            self._refrescar()
+
+
+def _resumen_aviso(aviso):
+    """Primera línea de un mensaje de error, sin Markdown, para el estado del lote."""
+    primera = next((l for l in (aviso or "❌ No se pudo descargar").splitlines() if l.strip()), "")
+    primera = primera.replace('*', '').replace('`', '').strip()
+    if not primera.startswith(('❌', '⚠️')):
+        primera = f"❌ {primera}"
+    return primera if len(primera) <= 90 else primera[:87] + "..."
+
+
+def _encolar_lote(chat_id, links, user_id, job_id=None, msg_espera=None, modo="video"):
+    """Como _encolar_descarga, pero para varios links: un trabajo por link en
+    cola_descargas y un solo mensaje de estado para todo el lote."""
+    texto = "\n".join(links)
+    lote = _LoteLinks(chat_id, links, job_id, modo)
+    if msg_espera is None:
+        msg_espera = monkey_bot.send_message(chat_id, lote.texto())
+    lote.msg_estado = msg_espera
+    if job_id is None:
+        lote.job_id = job_journal.registrar(chat_id, user_id, texto, "queued", msg_espera.message_id, modo=modo)
+    else:
+        job_journal.actualizar(job_id, "queued", msg_espera.message_id)
+
+    for i, link in enumerate(links):
+        posicion = cola_descargas.submit(
+            lambda i=i, link=link: _procesar_item_lote(lote, i, link, user_id),
+            on_position=lambda posicion, i=i: lote.en_fila(i, posicion) if posicion > 0 else None,
+        )
+        if posicion is None:
+            lote.listo(i, lambda: (False, "❌ El Monkey está saturado, intenta este link más tarde."))
+        elif posicion > 0:
+            lote.en_fila(i, posicion)
+
+
+def _procesar_item_lote(lote, i, link, user_id):
+    """Worker de un link del lote: solo descarga; el envío lo hace el lote en orden."""
+    lote.empezo(i)
+    preparado = {"error": "❌ Error inesperado al descargar"}
+    token = None
     try:
-        info, archivos_nuevos, dl_error = descargar_media(texto)
-    except Exception as e:
-        error_msg = str(e)[:800]
+        # Dentro del try: si falla (p.ej. al armar la clave), el lote igual
+        # recibe listo() y no se queda esperando este ítem para siempre
+        token = _seguir_progreso(lote.chat_id, link, lote.modo, lambda datos: lote.progreso(i, datos))
+        preparado = _preparar_descarga(link, user_id, lote.modo)
+    finally:
+        progreso_descargas.unsubscribe(token)
+        lote.listo(i, lambda: _entregar_preparado(lote.chat_id, link, user_id, preparado, lote.modo))
+
+
+# =============================================
+# TRABAJOS DE UN DEPLOY ANTERIOR
+# =============================================
+def reanudar_trabajos():
+    """Retoma (o da por fallidos) los trabajos que otra instancia dejó a medias.
+    Corre en su propio hilo mientras viva el bot: al arrancar reclama los que el
+    deploy anterior marcó como interrumpidos, y después los que queden huérfanos."""
+    if not MONKEY_JOB_JOURNAL:
+        return
+    while True:
+        for fila in job_journal.reclamar_huerfanos():
+            try:
+                _reanudar_trabajo(fila)
+            except Exception as e:
+                print(f"⚠️ MONKEY: no se pudo retomar el trabajo {fila.get('job_id')}: {e}")
+                job_journal.terminar(fila.get("job_id"))
+        time.sleep(60)
+
+
+def _reanudar_trabajo(fila):
+    job_id, chat_id, user_id = fila["job_id"], fila["chat_id"], fila["user_id"]
+    url, estado, message_id = fila["url"], fila["state"], fila.get("message_id")
+    modo = fila.get("mode") or "video"
+
+    if estado == "pending_accept":
+        # Solo hay que recordar el link: el botón de aceptar sigue en el chat.
+        # Si ya sobrevivió a varios reinicios sin aceptar, no vale la pena guardarlo.
+        if user_id not in pending_links and fila["attempts"] <= MONKEY_JOB_MAX_ATTEMPTS:
+            pending_links[user_id] = {"url": url, "chat_id": chat_id, "job_id": job_id, "modo": modo}
+        else:
+            job_journal.terminar(job_id)
+        return
+
+    msg_espera = SimpleNamespace(message_id=message_id) if message_id else None
+    if fila["attempts"] > MONKEY_JOB_MAX_ATTEMPTS:
+        print(f"🗑️ MONKEY: trabajo {job_id} ({estado}) agotó los reintentos tras reinicios")
+        job_journal.terminar(job_id)
+        texto = ("❌ El Monkey se reinició a mitad de tu descarga y no pudo retomarla. "
+                 "Envía el link de nuevo.")
+        try:
+            if msg_espera:
+                monkey_bot.edit_message_text(texto, chat_id, message_id)
+            else:
+                monkey_bot.send_message(chat_id, texto)
+        except:
+            pass
+        return
+
+    print(f"🔄 MONKEY: retomando trabajo {job_id} ({estado}) de {url}")
+    if msg_espera:
         try:
             monkey_bot.edit_message_text(
-                f"❌ Error al descargar:\n`{error_msg}`",
-                chat_id, msg_espera.message_id,
-                parse_mode='Markdown'
+                "🔄 El Monkey se reinició, retomando tu descarga... dame un monkey momento.",
+                chat_id, message_id
             )
         except:
             pass
-        return
+    _encolar_mensaje(chat_id, url, user_id, job_id=job_id, msg_espera=msg_espera, modo=modo)
+
 
+# =============================================
+# FUNCIÓN INTERNA: Procesar descarga
+# =============================================
+def _procesar_descarga(chat_id, texto, user_id, msg_espera, job_id=None, modo="video"):
+    """Procesa la descarga de un link. Corre en un worker de cola_descargas;
+    msg_espera es el mensaje que se edita con el resultado."""
+    plataforma = detectar_plataforma(texto)
+
+    def _mostrar_progreso(datos):
+        monkey_bot.edit_message_text(
+            f"{_texto_descargando(plataforma, modo)}\n⬇️ {_resumen_progreso(datos)}",
+            chat_id, msg_espera.message_id
+        )
+
+    try:
+        job_journal.actualizar(job_id, "downloading")
+        token = _seguir_progreso(chat_id, texto, modo, _mostrar_progreso) if msg_espera else None
+        try:
+            preparado = _preparar_descarga(texto, user_id, modo)
+        finally:
+            # Antes de mostrar el resultado: un progreso tardío no debe pisarlo
+            progreso_descargas.unsubscribe(token)
+        if "error" not in preparado:
+            job_journal.actualizar(job_id, "uploading")
+        enviado, aviso = _entregar_preparado(chat_id, texto, user_id, preparado, modo)
+        _mostrar_resultado(chat_id, msg_espera, enviado, aviso)
+    finally:
+        # Bien o mal, el trabajo terminó: un redeploy ya no tiene nada que retomar
+        job_journal.terminar(job_id)
+
+
+def _mostrar_resultado(chat_id, msg_espera, enviado, aviso):
+    """Si se envió algo, borra el mensaje de espera (y avisa aparte si quedó a
+    medias); si no, lo edita con el error."""
+    try:
+        if enviado:
+            monkey_bot.delete_message(chat_id, msg_espera.message_id)
+            if aviso:
+                monkey_bot.send_message(chat_id, aviso)
+        else:
+            monkey_bot.edit_message_text(aviso, chat_id, msg_espera.message_id, parse_mode='Markdown')
+    except:
+        pass
+
+
+def _preparar_descarga(texto, user_id, modo="video"):
+    """FASE 1 (en un worker): deja lista la descarga de un link sin enviar nada.
+    Retorna {"cacheados": [...]} si el link ya está en la caché de file_id,
+    {"lease": Lease} con la descarga, o {"error": texto} si falló."""
+    url_key = _clave(texto, modo)
+
+    # ---- CACHÉ DE file_id ----
+    cacheados = file_cache.get_file_ids(url_key)
+    if cacheados:
+        return {"cacheados": cacheados}
+
+    # ---- DESCARGA (compartida con otros trabajos del mismo link) ----
+    try:
+        # Si se adelantó mientras el usuario aceptaba, usar ese resultado
+        lease = prefetch_descargas.take(user_id, _clave_prefetch(texto, modo)) if MONKEY_PREFETCH else None
+        if lease is not None:
+            print(f"⚡ MONKEY PREFETCH: usando descarga adelantada de {url_key}")
+        else:
+            lease = _descargar_compartido(texto, modo)
+    except Exception as e:
+        return {"error": f"❌ Error al descargar:\n`{str(e)[:800]}`"}
+    return {"lease": lease}
+
+
+def _entregar_preparado(chat_id, texto, user_id, preparado, modo="video"):
+    """FASE 2: envía al chat lo que dejó _preparar_descarga y suelta el Lease.
+    Retorna (enviado, aviso): aviso es el error (Markdown) o la advertencia de
+    envío parcial, o None."""
+    url_key = _clave(texto, modo)
+    if "cacheados" in preparado:
+        if _servir_desde_cache(chat_id, url_key, preparado["cacheados"]):
+            return True, None
+        # file_id inválido o vencido del lado de Telegram → descargar de nuevo
+        preparado = _preparar_descarga(texto, user_id, modo)
+        if "cacheados" in preparado:
+            return False, "❌ No se pudo reenviar el contenido. Intenta enviar el link de nuevo."
+    if "error" in preparado:
+        return False, preparado["error"]
+
+    lease = preparado["lease"]
+    try:
+        # Si otro trabajo descargó y ya terminó de enviar, sus file_id ya están
+        # en la caché: reenviarlos es más rápido que volver a subir los archivos
+        if lease.shared:
+            cacheados = file_cache.get_file_ids(url_key)
+            if cacheados and _servir_desde_cache(chat_id, url_key, cacheados):
+                return True, None
+        return _entregar_descarga(chat_id, url_key, detectar_plataforma(texto), *lease.result)
+    finally:
+        lease.release()
+
+
+def _descargar_compartido(texto, modo="video"):
+    """Descarga un link a través de vuelos_descarga y retorna el Lease."""
+    url_key = _clave(texto, modo)
+
+    def _publicar(descargados, total, velocidad, eta):
+        progreso_descargas.publish(url_key, descargados, total, velocidad, eta)
+
+    return vuelos_descarga.do(
+        url_key, lambda: descargar_media(texto, limite_mb=TELEGRAM_MAX_FILE_MB, progreso=_publicar,
+                                         solo_audio=modo == "audio")
+    )
+
+
+def _servir_desde_cache(chat_id, url_key, cacheados):
+    """Si este link ya se mandó antes, Telegram ya tiene los archivos: se
+    reenvían por file_id sin descargar ni subir nada. Retorna True si se sirvió."""
+    try:
+        _reenviar_file_ids(chat_id, cacheados)
+    except Exception as e:
+        print(f"⚠️ MONKEY CACHE: reenvío por file_id falló ({e}), descargando...")
+        file_cache.invalidate(url_key)
+        return False
+    print(f"⚡ MONKEY CACHE HIT: {url_key}")
+    return True
+
+
+def _entregar_descarga(chat_id, url_key, plataforma, info, archivos_nuevos, dl_error):
+    """Envía al chat el resultado de una descarga. Retorna (enviado, aviso)
+    como _entregar_preparado. No borra los archivos: de eso se encarga el
+    Lease de la descarga."""
     print(f"\n🔍 MONKEY ARCHIVOS DESCARGADOS: {archivos_nuevos}")
     if dl_error:
         print(f"📛 MONKEY ERROR DE DESCARGA: {dl_error}")
 
     if not archivos_nuevos:
         # No se descargó nada - mostrar error amigable
-        try:
-            if dl_error:
-                user_msg = _generar_mensaje_error(dl_error, plataforma)
-                monkey_bot.edit_message_text(
-                    user_msg, chat_id, msg_espera.message_id, parse_mode='Markdown'
-                )
-            else:
-                monkey_bot.edit_message_text(
-                    "❌ No se pudo descargar. El post puede ser privado o la plataforma bloqueó la descarga.",
-                    chat_id, msg_espera.message_id
-                )
-        except:
-            pass
-        return
+        if dl_error:
+            return False, _generar_mensaje_error(dl_error, plataforma)
+        return False, "❌ No se pudo descargar. El post puede ser privado o la plataforma bloqueó la descarga."
 
-    # ---- FASE 2: ENVÍO A TELEGRAM ----
+    # ---- ENVÍO A TELEGRAM ----
     # Los timeouts aquí NO son de la descarga: son de la subida de archivos
     # pesados a Telegram, así que se reportan como error de envío.
     enviados, intentados = 0, 0
     error_envio = None
     try:
-        enviados, intentados = _enviar_archivos(chat_id, archivos_nuevos)
+        enviados, intentados, file_ids = _enviar_archivos(chat_id, archivos_nuevos)
+        # Solo se cachean envíos completos: uno parcial dejaría el link a medias
+        if enviados and enviados == intentados == len(archivos_nuevos) == len(file_ids):
+            file_cache.store_file_ids(url_key, file_ids)
     except Exception as e:
         error_envio = e
         print(f"❌ MONKEY ERROR DE ENVÍO: {e}")
-    finally:
-        # Limpiar archivos descargados pase lo que pase
-        for arch in archivos_nuevos:
-            try:
-                os.remove(arch)
-            except:
-                pass
 
     if enviados > 0:
-        try:
-            monkey_bot.delete_message(chat_id, msg_espera.message_id)
-        except:
-            pass
         if enviados < intentados:
-            monkey_bot.send_message(
-                chat_id,
+            return True, (
                 f"⚠️ Solo pude enviar {enviados} de {intentados} archivos, "
                 "la conexión falló con el resto. Intenta enviar el link de nuevo."
             )
-    else:
-        if intentados == 0 and error_envio is None:
-            texto_error = (
-                "❌ El contenido se descargó pero supera el límite de "
-                f"{TELEGRAM_MAX_FILE_MB} MB de Telegram y no se puede enviar."
-            )
-        else:
-            detalle = str(error_envio)[:200] if error_envio else "la conexión con Telegram falló"
-            texto_error = (
-                "❌ El contenido se descargó bien, pero falló la subida a Telegram "
-                f"(conexión lenta o archivos pesados):\n`{detalle}`\n\n"
-                "Intenta enviar el link de nuevo."
-            )
-        try:
-            monkey_bot.edit_message_text(
-                texto_error, chat_id, msg_espera.message_id, parse_mode='Markdown'
-            )
-        except:
-            pass
+        return True, None
+    if intentados == 0 and error_envio is None:
+        return False, (
+            "❌ El contenido se descargó pero supera el límite de "
+            f"{TELEGRAM_MAX_FILE_MB} MB de Telegram y no se puede enviar."
+        )
+    detalle = str(error_envio)[:200] if error_envio else "la conexión con Telegram falló"
+    return False, (
+        "❌ El contenido se descargó bien, pero falló la subida a Telegram "
+        f"(conexión lenta o archivos pesados):\n`{detalle}`\n\n"
+        "Intenta enviar el link de nuevo."
+    )
 
 
 def _es_error_de_conexion(e):
@@ -339,13 +858,31 @@ def _es_error_de_conexion(e):
             or 'aborted' in s or 'reset' in s)
 
 
+def _espera_flood(e):
+    """Segundos que pide Telegram en un 429 (flood control), o None si `e` no
+    es un 429. Sirve para TelegramError (telegram_upload) y para la excepción
+    de telebot, que trae el JSON de la respuesta."""
+    if getattr(e, 'error_code', None) != 429:
+        return None
+    espera = getattr(e, 'retry_after', None)
+    if espera is None:
+        espera = ((getattr(e, 'result_json', None) or {}).get('parameters') or {}).get('retry_after')
+    return espera or 5
+
+
 def _con_reintentos(accion, descripcion):
-    """Ejecuta una acción de envío reintentando si la conexión falla."""
+    """Ejecuta una acción de envío reintentando si la conexión falla o si
+    Telegram pide esperar (429)."""
     for intento in range(REINTENTOS_ENVIO):
         try:
             return accion()
         except Exception as e:
-            if _es_error_de_conexion(e) and intento < REINTENTOS_ENVIO - 1:
+            flood = _espera_flood(e)
+            if flood is not None and intento < REINTENTOS_ENVIO - 1:
+                print(f"⏳ Telegram pidió esperar {flood}s para {descripcion}, "
+                      f"reintento {intento + 1}/{REINTENTOS_ENVIO - 1}...")
+                time.sleep(flood)
+            elif _es_error_de_conexion(e) and intento < REINTENTOS_ENVIO - 1:
                 espera = (intento + 1) * 5
                 print(f"⏳ Envío de {descripcion} falló ({e}), "
                       f"reintento {intento + 1}/{REINTENTOS_ENVIO - 1} en {espera}s...")
@@ -354,47 +891,156 @@ def _con_reintentos(accion, descripcion):
                 raise
 
 
+def _file_id_de(mensaje):
+    """Extrae {type, file_id} de un Message de la Bot API (JSON crudo de
+    telegram_upload) para la caché de file_id."""
+    if mensaje.get('video'):
+        return {"type": "video", "file_id": mensaje['video']['file_id']}
+    if mensaje.get('audio'):
+        return {"type": "audio", "file_id": mensaje['audio']['file_id']}
+    if mensaje.get('photo'):
+        # photo trae todas las resoluciones; la última es la original
+        return {"type": "photo", "file_id": mensaje['photo'][-1]['file_id']}
+    return None
+
+
+# Las subidas con archivos van por telegram_upload en vez de telebot: el cuerpo
+# multipart se lee del disco en bloques y no se arma entero en memoria.
 def _enviar_individual(chat_id, archivo):
-    """Envía un solo archivo con timeout largo y reintentos."""
+    """Envía un solo archivo con timeout largo y reintentos.
+    Retorna la lista (de uno) de Message enviados."""
     def _send():
-        with open(archivo, 'rb') as f:
-            if archivo.lower().endswith('.mp4'):
-                monkey_bot.send_video(chat_id, f, supports_streaming=True,
-                                      timeout=UPLOAD_TIMEOUT)
-            else:
-                monkey_bot.send_photo(chat_id, f, timeout=UPLOAD_TIMEOUT)
-    _con_reintentos(_send, os.path.basename(archivo))
+        return telegram_upload.send_media_file(
+            MONKEY_TELEGRAM_TOKEN, chat_id, archivo, timeout=UPLOAD_TIMEOUT
+        )
+    return [_con_reintentos(_send, os.path.basename(archivo))]
 
 
 def _enviar_media_group(chat_id, lote):
-    """Envía un lote como media group, cerrando siempre los archivos abiertos
-    (si quedan abiertos, en Windows no se pueden borrar después)."""
+    """Envía un lote como media group en streaming desde el disco (los
+    archivos se abren y cierran al vuelo, así en Windows se pueden borrar después).
+    Retorna la lista de Message enviados, en el orden del lote."""
     def _send():
-        handles = []
+        return telegram_upload.send_media_group(
+            MONKEY_TELEGRAM_TOKEN, chat_id, lote, timeout=UPLOAD_TIMEOUT
+        )
+    return _con_reintentos(_send, f"media group de {len(lote)} archivos") or []
+
+
+def _enviar_lote(chat_id, lote):
+    """Envía un lote (media group, o individual si es uno solo). Si el media
+    group falla, reintenta archivo por archivo. Retorna (enviados, mensajes)."""
+    if len(lote) == 1:
         try:
-            media_group = []
-            for archivo in lote:
-                f = open(archivo, 'rb')
-                handles.append(f)
-                if archivo.lower().endswith('.mp4'):
-                    media_group.append(InputMediaVideo(f))
-                else:
-                    media_group.append(InputMediaPhoto(f))
-            monkey_bot.send_media_group(chat_id, media_group, timeout=UPLOAD_TIMEOUT)
-        finally:
-            for f in handles:
-                try:
-                    f.close()
-                except:
-                    pass
-    _con_reintentos(_send, f"media group de {len(lote)} archivos")
+            return 1, _enviar_individual(chat_id, lote[0])
+        except Exception as e:
+            print(f"❌ Error enviando {lote[0]}: {e}")
+            return 0, []
+
+    try:
+        return len(lote), _enviar_media_group(chat_id, lote)
+    except Exception as mg_err:
+        print(f"⚠️ Error media_group, enviando uno por uno: {mg_err}")
+    enviados, mensajes = 0, []
+    for archivo in lote:
+        try:
+            mensajes += _enviar_individual(chat_id, archivo)
+            enviados += 1
+        except Exception as ind_err:
+            print(f"❌ Error enviando {archivo}: {ind_err}")
+    return enviados, mensajes
+
+
+@contextmanager
+def _semaforo_chat(chat_id):
+    """Tope de subidas simultáneas por chat (MONKEY_UPLOAD_CONCURRENCIA). La
+    entrada del chat se borra cuando no le quedan subidas en curso ni esperando."""
+    with _semaforos_chat_lock:
+        entrada = _semaforos_chat.get(chat_id)
+        if entrada is None:
+            entrada = _semaforos_chat[chat_id] = [threading.BoundedSemaphore(MONKEY_UPLOAD_CONCURRENCIA), 0]
+        entrada[1] += 1
+    try:
+        with entrada[0]:
+            yield
+    finally:
+        with _semaforos_chat_lock:
+            entrada[1] -= 1
+            if not entrada[1]:
+                del _semaforos_chat[chat_id]
+
+
+def _enviar_lotes_en_paralelo(chat_id, lotes):
+    """Sube lotes independientes a la vez y los publica en el chat en orden.
+
+    Telegram publica cada media group cuando termina SU subida, así que subidos
+    en paralelo al chat del usuario llegarían desordenados. Se suben en
+    paralelo a MONKEY_UPLOAD_STAGING_CHAT y, a medida que están, se mandan al
+    usuario por file_id en el orden de `lotes` (mandar por file_id no sube
+    nada). Si un lote no se puede mandar así, se sube directo al chat. Las
+    copias del staging se borran al terminar: el file_id sigue sirviendo.
+    Retorna [(enviados, mensajes)] en el orden de `lotes`."""
+    def _subir(lote):
+        with _semaforo_chat(chat_id):
+            return _enviar_lote(MONKEY_UPLOAD_STAGING_CHAT, lote)
+
+    futuros = [_pool_subidas.submit(_subir, lote) for lote in lotes]
+    resultados, en_staging = [], []
+    try:
+        for n, (lote, futuro) in enumerate(zip(lotes, futuros), 1):
+            try:
+                enviados, mensajes = futuro.result()
+                en_staging += [m['message_id'] for m in mensajes]
+                items = [item for item in (_file_id_de(m) for m in mensajes) if item]
+                if len(items) < len(lote):
+                    raise RuntimeError(f"{len(lote) - len(items)} archivos no llegaron al staging")
+                _con_reintentos(lambda: _reenviar_file_ids(chat_id, items), f"lote {n} por file_id")
+                resultados.append((enviados, mensajes))
+            except Exception as e:
+                print(f"⚠️ Lote {n}/{len(lotes)} no pasó por staging ({e}), subiendo directo")
+                resultados.append(_enviar_lote(chat_id, lote))
+    finally:
+        _borrar_de_staging(en_staging)
+    return resultados
+
+
+def _borrar_de_staging(ids):
+    """Borra del chat de staging las copias ya reenviadas (o que no sirvieron)."""
+    # deleteMessages acepta hasta 100 mensajes por llamada
+    for i in range(0, len(ids), 100):
+        try:
+            _con_reintentos(lambda: monkey_bot.delete_messages(MONKEY_UPLOAD_STAGING_CHAT, ids[i:i + 100]),
+                            "borrado del staging")
+        except Exception as e:
+            print(f"⚠️ No se pudieron borrar {len(ids[i:i + 100])} mensajes del staging: {e}")
+
+
+def _reenviar_file_ids(chat_id, items):
+    """Reenvía contenido ya subido a Telegram usando solo sus file_id.
+    No hay límite de peso por lote: nada viaja, así que solo importa el máximo
+    de 10 medias por media group."""
+    for i in range(0, len(items), 10):
+        lote = items[i:i + 10]
+        if len(lote) == 1:
+            item = lote[0]
+            if item["type"] == "video":
+                monkey_bot.send_video(chat_id, item["file_id"], supports_streaming=True)
+            elif item["type"] == "audio":
+                monkey_bot.send_audio(chat_id, item["file_id"])
+            else:
+                monkey_bot.send_photo(chat_id, item["file_id"])
+            continue
+        tipos = {"video": InputMediaVideo, "audio": InputMediaAudio, "photo": InputMediaPhoto}
+        media_group = [tipos.get(item["type"], InputMediaPhoto)(item["file_id"]) for item in lote]
+        monkey_bot.send_media_group(chat_id, media_group)
 
 
 def _enviar_archivos(chat_id, archivos_nuevos):
     """Envía los archivos descargados al chat.
 
-    Retorna (enviados, intentados). Los archivos que superan el límite de
-    Telegram se descartan con aviso y no cuentan como intentados."""
+    Retorna (enviados, intentados, file_ids). Los archivos que superan el límite
+    de Telegram se descartan con aviso y no cuentan como intentados. file_ids es
+    la lista de {type, file_id} enviados, en orden, para la caché."""
     enviables = []
     for archivo in archivos_nuevos:
         try:
@@ -427,37 +1073,30 @@ def _enviar_archivos(chat_id, archivos_nuevos):
     if lote_actual:
         lotes.append(lote_actual)
 
-    enviados = 0
-    for lote in lotes:
-        if len(lote) == 1:
-            try:
-                _enviar_individual(chat_id, lote[0])
-                enviados += 1
-            except Exception as e:
-                print(f"❌ Error enviando {lote[0]}: {e}")
-            continue
-
-        try:
-            _enviar_media_group(chat_id, lote)
-            enviados += len(lote)
-        except Exception as mg_err:
-            print(f"⚠️ Error media_group, enviando uno por uno: {mg_err}")
-            for archivo in lote:
-                try:
-                    _enviar_individual(chat_id, archivo)
-                    enviados += 1
-                except Exception as ind_err:
-                    print(f"❌ Error enviando {archivo}: {ind_err}")
+    if MONKEY_UPLOAD_STAGING_CHAT and MONKEY_UPLOAD_CONCURRENCIA > 1 and len(lotes) > 1:
+        resultados = _enviar_lotes_en_paralelo(chat_id, lotes)
+    else:
+        resultados = [_enviar_lote(chat_id, lote) for lote in lotes]
 
-    return enviados, len(enviables)
+    enviados = sum(n for n, _ in resultados)
+    file_ids = [item for _, mensajes in resultados
+                for item in (_file_id_de(m) for m in mensajes) if item]
+    return enviados, len(enviables), file_ids
 
 
 def _generar_mensaje_error(dl_error, plataforma):
     """Genera un mensaje de error amigable basado en el tipo de error."""
     dl_lower = dl_error.lower()
 
-    if 'empty media response' in dl_lower or 'not available to everyone' in dl_lower or 'login required' in dl_lower:
-        if not IG_USERNAME and not IG_COOKIES_RAW:
+    if dl_lower.startswith('too_large'):
+        detalle = dl_error.split(':', 1)[1].strip() if ':' in dl_error else ''
+        return (
+            f"❌ Este contenido supera el límite de {TELEGRAM_MAX_FILE_MB} MB de Telegram "
+            "incluso en la calidad más baja, así que no se descargó.\n"
+            f"{detalle}"
+        ).strip()
+    elif 'empty media response' in dl_lower or 'not available to everyone' in dl_lower or 'login required' in dl_lower:
+        if not IG_USERNAME and not cookies_instagram.configured():
             return (
                 "❌ **Contenido Restringido en Instagram**\n\n"
                 "Este post requiere inicio de sesión para verse (NSFW o restricción de edad).\n"
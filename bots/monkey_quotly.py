@@ -22,6 +22,7 @@ from telebot import types
 from config import MONKEY_QUOTLY_TOKEN
 from services import quotly_store as store
 from services import quotly_render as render
+from services.video_reencode import ffmpeg_exe as _ffmpeg_exe
 
 # Placeholder con ':' válido para telebot>=4.36 (valida el token al construir).
 # main.py no arranca el polling si MONKEY_QUOTLY_TOKEN no está configurado.
@@ -617,15 +618,6 @@ def _to_webp_static(buf):
     return out.getvalue()
 
 
-def _ffmpeg_exe():
-    """Binario de ffmpeg. Usa el que trae imageio-ffmpeg (sirve en Render nativo)."""
-    try:
-        import imageio_ffmpeg
-        return imageio_ffmpeg.get_ffmpeg_exe()
-    except Exception:
-        return "ffmpeg"
-
-
 def _to_webm_video(buf):
     tmpdir = tempfile.mkdtemp(prefix="qsticker-")
     inp = os.path.join(tmpdir, "in.mp4")
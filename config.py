@@ -3,12 +3,24 @@ config.py - Configuración centralizada del proyecto.
 Todas las variables de entorno, constantes, y clientes externos.
 """
 import os
+import threading
+from typing import TYPE_CHECKING
+
 import stripe
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 
+# ===============================
+# ARRANQUE
+# ===============================
+# True = main.py abre el puerto HTTP (lo que chequea Render) ANTES de importar los
+# bots, y cada bot carga sus dependencias pesadas en segundo plano después.
+LAZY_INIT = os.environ.get('LAZY_INIT', '1') != '0'
+
 # ===============================
 # SAFE MODE
 # ===============================
@@ -112,7 +124,29 @@ DISCORD_BOT_INSTALL_URL = os.environ.get(
 # ===============================
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+class _SupabaseLazy:
+    """Crea el cliente de Supabase en el primer uso y delega todo en él.
+    Importar supabase y construir el cliente no hace falta para abrir el puerto."""
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import create_client
+                    self._client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+
+supabase: "Client" = _SupabaseLazy()
 TABLE_NAME = "subscriptions_discord"
 
 # Tablas del nuevo sistema de Telegram Stars
@@ -149,6 +183,82 @@ TELEGRAM_LINKS = {
 # ===============================
 MONKEY_TELEGRAM_TOKEN = os.environ.get('MONKEY_TELEGRAM_TOKEN', '8716244791:AAEdLg6RTfdNljLb3UreC9k9wauUk-1te0o')
 
+# Caché de file_id de Telegram: un link repetido se reenvía con los file_id ya
+# subidos, sin volver a descargar ni subir nada. MONKEY_FILE_CACHE=0 lo desactiva.
+MONKEY_FILE_CACHE = os.environ.get('MONKEY_FILE_CACHE', '1') != '0'
+MONKEY_FILE_CACHE_TTL_HOURS = float(os.environ.get('MONKEY_FILE_CACHE_TTL_HOURS', '168'))
+MONKEY_FILE_CACHE_MAX = int(os.environ.get('MONKEY_FILE_CACHE_MAX', '2000'))
+
+# Pool de descargas: cuántas corren a la vez y cuántas pueden esperar en la fila
+MONKEY_DOWNLOAD_WORKERS = int(os.environ.get('MONKEY_DOWNLOAD_WORKERS', '3'))
+MONKEY_DOWNLOAD_QUEUE_MAX = int(os.environ.get('MONKEY_DOWNLOAD_QUEUE_MAX', '30'))
+# Lotes de un carrusel que se suben a la vez (1 = uno tras otro). En paralelo se
+# suben a MONKEY_UPLOAD_STAGING_CHAT (un canal privado donde el bot es admin) y
+# después se mandan al usuario en orden por file_id y se borran del canal (el bot
+# necesita permiso para borrar mensajes); sin ese chat, uno tras otro.
+MONKEY_UPLOAD_CONCURRENCIA = int(os.environ.get('MONKEY_UPLOAD_CONCURRENCIA', '3'))
+MONKEY_UPLOAD_STAGING_CHAT = os.environ.get('MONKEY_UPLOAD_STAGING_CHAT', '')
+
+# Re-encode con ffmpeg de videos que no entran en el límite de Telegram en ningún
+# formato. Apagado por defecto: encodear es caro en la CPU chica de Render.
+MONKEY_REENCODE = os.environ.get('MONKEY_REENCODE', '0') == '1'
+# Peso máximo del formato más liviano que se acepta bajar para re-encodear
+MONKEY_REENCODE_MAX_SOURCE_MB = int(os.environ.get('MONKEY_REENCODE_MAX_SOURCE_MB', '300'))
+MONKEY_REENCODE_WORKERS = int(os.environ.get('MONKEY_REENCODE_WORKERS', '1'))
+MONKEY_REENCODE_THREADS = int(os.environ.get('MONKEY_REENCODE_THREADS', '1'))
+
+# Prefetch especulativo: la descarga arranca mientras el usuario nuevo decide si
+# acepta al Monkey. Se descarta si no acepta en el TTL; tope de disco aparte.
+MONKEY_PREFETCH = os.environ.get('MONKEY_PREFETCH', '1') != '0'
+MONKEY_PREFETCH_TTL_SECONDS = int(os.environ.get('MONKEY_PREFETCH_TTL_SECONDS', '600'))
+MONKEY_PREFETCH_MAX_MB = int(os.environ.get('MONKEY_PREFETCH_MAX_MB', '300'))
+MONKEY_PREFETCH_WORKERS = int(os.environ.get('MONKEY_PREFETCH_WORKERS', '1'))
+
+# Descargas HTTP directas (CDN de Instagram): se retoman con Range si se cortan.
+# Con MONKEY_HTTP_SEGMENTS > 1, los archivos de más de MONKEY_HTTP_SEGMENT_MIN_MB
+# se bajan en ese número de rangos en paralelo.
+MONKEY_HTTP_SEGMENTS = int(os.environ.get('MONKEY_HTTP_SEGMENTS', '1'))
+MONKEY_HTTP_SEGMENT_MIN_MB = int(os.environ.get('MONKEY_HTTP_SEGMENT_MIN_MB', '8'))
+
+# Disco de downloads/: cuota total (se desaloja lo que espera sin uso) y edad a
+# partir de la cual algo que nadie usa se considera huérfano y se borra
+MONKEY_DISK_QUOTA_MB = int(os.environ.get('MONKEY_DISK_QUOTA_MB', '2048'))
+MONKEY_DISK_ORPHAN_MINUTES = int(os.environ.get('MONKEY_DISK_ORPHAN_MINUTES', '30'))
+MONKEY_DISK_SWEEP_SECONDS = int(os.environ.get('MONKEY_DISK_SWEEP_SECONDS', '60'))
+
+# Progreso en vivo en el mensaje de espera (porcentaje, velocidad, ETA): como
+# mucho una edición cada tantos segundos por chat. 0 lo desactiva.
+MONKEY_PROGRESS_INTERVAL_SECONDS = int(os.environ.get('MONKEY_PROGRESS_INTERVAL_SECONDS', '5'))
+
+# Caché del sondeo de yt-dlp (extract_info sin descargar) por media: los
+# reintentos y el sondeo de tamaño no vuelven a extraer. 0 la desactiva.
+MONKEY_PROBE_CACHE_TTL_SECONDS = int(os.environ.get('MONKEY_PROBE_CACHE_TTL_SECONDS', '600'))
+MONKEY_PROBE_CACHE_MAX = int(os.environ.get('MONKEY_PROBE_CACHE_MAX', '200'))
+
+# Instancias de YoutubeDL reutilizables por perfil de opciones (YDL_OPTS,
+# Twitter, Instagram, TikTok). 0 vuelve a crear una por descarga.
+MONKEY_YDL_POOL_SIZE = int(os.environ.get('MONKEY_YDL_POOL_SIZE', '3'))
+
+# Fragmentos HLS/DASH en paralelo por plataforma ("plataforma=n,...", 'default'
+# para el resto) y tope global de conexiones extra entre todas las descargas
+MONKEY_FRAGMENTS = {
+    plataforma.strip(): int(n)
+    for plataforma, n in (
+        par.split('=', 1)
+        for par in os.environ.get('MONKEY_FRAGMENTS', 'youtube=4,twitter=4,facebook=2').split(',')
+        if '=' in par
+    )
+}
+MONKEY_FRAGMENT_SLOTS = int(os.environ.get('MONKEY_FRAGMENT_SLOTS', '12'))
+
+# Bitácora de trabajos en Supabase: un redeploy no deja descargas colgadas, al
+# arrancar se retoman (o se avisa que fallaron). MONKEY_JOB_JOURNAL=0 la desactiva.
+MONKEY_JOB_JOURNAL = os.environ.get('MONKEY_JOB_JOURNAL', '1') != '0'
+# Un trabajo de otra instancia sin novedades en este tiempo se da por huérfano
+MONKEY_JOB_STALE_MINUTES = int(os.environ.get('MONKEY_JOB_STALE_MINUTES', '30'))
+# Veces que se retoma un mismo trabajo antes de darlo por fallido
+MONKEY_JOB_MAX_ATTEMPTS = int(os.environ.get('MONKEY_JOB_MAX_ATTEMPTS', '2'))
+
 # ===============================
 # TELEGRAM - Bot 3 (Cobro con Stars) - NUEVO, bot independiente
 # ===============================
@@ -168,3 +278,15 @@ MONKEY_QUOTLY_TOKEN = os.environ.get('MONKEY_QUOTLY_TOKEN')
 IG_USERNAME = os.environ.get('IG_USERNAME', '')
 IG_PASSWORD = os.environ.get('IG_PASSWORD', '')
 IG_COOKIES_RAW = os.environ.get('IG_COOKIES', '')
+
+# ===============================
+# COOKIES (recarga en caliente)
+# ===============================
+# Archivos Netscape opcionales (p.ej. Secret Files de Render). Si existen tienen
+# prioridad sobre IG_COOKIES / las cookies por defecto, y al cambiarlos se
+# recargan sin reiniciar.
+IG_COOKIES_PATH = os.environ.get('IG_COOKIES_PATH', '')
+TWITTER_COOKIES_PATH = os.environ.get('TWITTER_COOKIES_PATH', '')
+YOUTUBE_COOKIES_PATH = os.environ.get('YOUTUBE_COOKIES_PATH', '')
+# Cada cuánto (segundos) se mira si la fuente de cookies cambió
+COOKIES_RELOAD_SECONDS = int(os.environ.get('COOKIES_RELOAD_SECONDS', '30'))
@@ -0,0 +1,8 @@
+-- Sesión persistida de instaloader (services/ig_session_store.py).
+-- Ejecutar en el SQL Editor de Supabase.
+
+create table if not exists instagram_sessions (
+    username   text primary key,          -- cuenta de Instagram (IG_USERNAME)
+    session    jsonb not null,            -- cookies de instaloader (save_session)
+    updated_at timestamptz default now()
+);
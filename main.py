@@ -6,6 +6,7 @@ import os
 import sys
 import time
 import signal
+import socket
 import threading
 
 # En Render stdout no es una terminal, así que Python lo bufferea por bloques y los
@@ -15,18 +16,33 @@ import threading
 sys.stdout.reconfigure(line_buffering=True)
 sys.stderr.reconfigure(line_buffering=True)
 
+from services.startup_metrics import importar_medido, marcar
+
 import uvicorn
 
-# Importar los bots (los handlers se registran al importar)
-from bots.discord_bot import discord_client
-from bots.telegram_access import telegram_bot
-from bots.monkey_descargar import monkey_bot
-from bots.telegram_stars import stars_bot
-from bots.monkey_quotly import bot as quotly_bot
+from config import LAZY_INIT
 
 # Importar la app FastAPI
 from api.webhooks import app
 
+# Los bots se importan con importar_medido (los handlers se registran al importar).
+# Con LAZY_INIT cada hilo importa su bot DESPUÉS de que el puerto está abierto:
+# esos imports escriben cookies, cargan yt-dlp, instaloader, Pillow... y Render
+# daba el deploy por caído si el puerto tardaba en responder.
+BOT_MODULES = {
+    "discord": ("bots.discord_bot", "discord_client"),
+    "telegram_access": ("bots.telegram_access", "telegram_bot"),
+    "monkey": ("bots.monkey_descargar", "monkey_bot"),
+    "stars": ("bots.telegram_stars", "stars_bot"),
+    "quotly": ("bots.monkey_quotly", "bot"),
+}
+
+
+def _bot(nombre):
+    """Importa (midiendo el tiempo) y devuelve el objeto bot de BOT_MODULES."""
+    modulo, atributo = BOT_MODULES[nombre]
+    return getattr(importar_medido(modulo), atributo)
+
 
 ## ====================
 ## SIGNAL HANDLING
@@ -34,13 +50,17 @@ from api.webhooks import app
 def graceful_shutdown(signum, frame):
     """Detiene los bots de forma limpia al recibir señales del sistema (SIGTERM/SIGINT)."""
     print(f"\n🛑 Señal {signum} recibida. Deteniendo servicios...")
-    try:
-        telegram_bot.stop_polling()
-        monkey_bot.stop_polling()
-        stars_bot.stop_polling()
-        quotly_bot.stop_polling()
-    except:
-        pass
+    # Solo los bots que llegaron a importarse (con LAZY_INIT puede faltar alguno)
+    for nombre in ("telegram_access", "monkey", "stars", "quotly"):
+        modulo, atributo = BOT_MODULES[nombre]
+        if modulo in sys.modules:
+            try:
+                getattr(sys.modules[modulo], atributo).stop_polling()
+            except:
+                pass
+    # Las descargas a medias quedan para que las retome la próxima instancia
+    if "services.job_journal" in sys.modules:
+        sys.modules["services.job_journal"].marcar_interrumpidos()
     print("👋 Servicios detenidos. Saliendo...")
     sys.exit(0)
 
@@ -56,6 +76,7 @@ signal.signal(signal.SIGINT, graceful_shutdown)
 def start_discord():
     """Hilo para Discord con auto-reconnect."""
     from config import DISCORD_BOT_TOKEN
+    discord_client = _bot("discord")
     while True:
         try:
             print("🎮 Iniciando Discord Bot...")
@@ -67,6 +88,7 @@ def start_discord():
 
 def start_telegram_access():
     """Hilo para el bot de acceso al canal."""
+    telegram_bot = _bot("telegram_access")
     while True:
         try:
             print("🤖 Telegram Bot 1 (Acceso) iniciado...")
@@ -83,6 +105,16 @@ def start_telegram_access():
 
 def start_monkey_bot():
     """Hilo para el bot descargador MonkeyDescargar."""
+    monkey_bot = _bot("monkey")
+    # Descargas que el deploy anterior dejó a medias (ver services/job_journal.py)
+    from bots.monkey_descargar import reanudar_trabajos
+    threading.Thread(target=reanudar_trabajos, name="monkey-reanudar", daemon=True).start()
+    # Barrido de downloads/: huérfanos al arrancar y después cada tanto
+    from services import disk_janitor
+    disk_janitor.iniciar()
+    # Instancias de yt-dlp listas antes del primer link (ver services/ydl_pool.py)
+    from services import ydl_pool
+    ydl_pool.calentar()
     while True:
         try:
             print("🐵 MonkeyDescargar Bot iniciado...")
@@ -103,6 +135,7 @@ def start_stars_bot():
     if not STARS_TELEGRAM_TOKEN:
         print("⚠️ STARS_TELEGRAM_TOKEN no configurado. Bot de Stars deshabilitado.")
         return
+    stars_bot = _bot("stars")
     while True:
         try:
             print("⭐ Telegram Stars Bot iniciado...")
@@ -125,6 +158,7 @@ def start_quotly_bot():
     if not MONKEY_QUOTLY_TOKEN:
         print("⚠️ MONKEY_QUOTLY_TOKEN no configurado. Bot Quotly deshabilitado.")
         return
+    quotly_bot = _bot("quotly")
     while True:
         try:
             print("💬 Quotly/Monkey stickers Bot iniciado...")
@@ -139,7 +173,8 @@ def start_quotly_bot():
                 time.sleep(5)
 
 
-if __name__ == "__main__":
+def start_bots():
+    """Arranca cada bot en su hilo daemon."""
     # Discord en hilo daemon
     threading.Thread(target=start_discord, daemon=True).start()
 
@@ -157,6 +192,38 @@ if __name__ == "__main__":
 
     print("🚀 Todos los servicios iniciados")
 
-    # FastAPI en el HILO PRINCIPAL (Render monitorea este puerto)
+
+def start_bots_when_port_bound(port, timeout=30):
+    """Warm-up en segundo plano: espera a que uvicorn abra el puerto y recién
+    entonces importa y arranca los bots. Si el puerto no abre en `timeout`
+    segundos, arranca igual (los bots no dependen de la API)."""
+    limite = time.time() + timeout
+    abierto = False
+    while not abierto and time.time() < limite:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                abierto = True
+        except OSError:
+            time.sleep(0.1)
+    if abierto:
+        marcar("port_bound")
+        print(f"🌐 Puerto {port} abierto, cargando los bots en segundo plano...")
+    else:
+        marcar("port_wait_timeout")
+        print(f"⚠️ El puerto {port} no abrió en {timeout}s, cargando los bots igual...")
+    start_bots()
+
+
+if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
+
+    if LAZY_INIT:
+        threading.Thread(target=start_bots_when_port_bound, args=(port,), daemon=True).start()
+    else:
+        # Modo clásico: todo importado antes de abrir el puerto
+        for nombre in BOT_MODULES:
+            _bot(nombre)
+        start_bots()
+
+    # FastAPI en el HILO PRINCIPAL (Render monitorea este puerto)
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,10 @@
+-- Caché de file_id de Telegram del bot MonkeyDescargar (services/file_cache.py).
+-- Ejecutar en el SQL Editor de Supabase.
+
+create table if not exists monkey_file_cache (
+    url_key    text primary key,          -- clave de la media (clave_media), p.ej. instagram:C8aRs6CJvSD
+    items      jsonb not null,            -- [{"type": "video"|"photo", "file_id": "..."}]
+    created_at timestamptz default now()  -- para el TTL
+);
+
+create index if not exists monkey_file_cache_created_idx on monkey_file_cache (created_at);
@@ -0,0 +1,22 @@
+-- Bitácora de trabajos del bot MonkeyDescargar (services/job_journal.py).
+-- Ejecutar en el SQL Editor de Supabase.
+
+create table if not exists monkey_jobs (
+    job_id      text primary key,
+    instance_id text not null,             -- proceso que tiene el trabajo
+    chat_id     bigint not null,
+    user_id     bigint not null,
+    url         text not null,
+    mode        text not null default 'video',  -- video | audio (comando /audio)
+    state       text not null,             -- pending_accept | queued | downloading | uploading
+    message_id  bigint,                    -- mensaje de espera que se edita
+    attempts    integer not null default 0,
+    interrupted boolean not null default false,  -- la instancia se apagó con el trabajo a medias
+    created_at  timestamptz default now(),
+    updated_at  timestamptz default now()
+);
+
+create index if not exists monkey_jobs_instance_idx on monkey_jobs (instance_id);
+
+-- Tablas creadas antes del comando /audio:
+alter table monkey_jobs add column if not exists mode text not null default 'video';
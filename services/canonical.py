@@ -0,0 +1,160 @@
+"""
+canonical.py - Identidad estable de cada media: (plataforma, media_id).
+
+El mismo video llega escrito de mil formas: vm.tiktok.com/ZM..., t.co/..., fb.watch/...,
+/reel/ vs /p/ en Instagram, m.youtube.com, mobile.twitter.com, con y sin
+parámetros de tracking. Para la caché de file_id, el single-flight y el prefetch
+eran links distintos, y el mismo reel se bajaba y se subía otra vez.
+
+expandir() resuelve una sola vez los links cortos (siguiendo las redirecciones
+sin bajar el contenido) y recuerda el destino en una tabla en memoria.
+identidad() saca (plataforma, media_id) de una URL ya expandida, y clave() arma
+con eso la clave que usan las cachés ("instagram:C8aRs6CJvSD"); si la URL no
+se reconoce, la clave es la URL misma.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+# Links cortos o de "compartir" que solo sirven para redirigir
+_CORTOS = [
+    re.compile(r'^(?:vm|vt)\.tiktok\.com$'),
+    re.compile(r'^t\.co$'),
+    re.compile(r'^fb\.watch$'),
+    re.compile(r'^fb\.gg$'),
+]
+_CORTOS_RUTA = [
+    re.compile(r'(?:^|\.)tiktok\.com/t/'),
+    re.compile(r'(?:^|\.)facebook\.com/share/'),
+    re.compile(r'(?:^|\.)instagram\.com/share/'),
+]
+
+# (plataforma, patrón con el id en el grupo 1). Los subdominios (www., m.,
+# mobile., music.) no importan: el patrón mira desde el dominio.
+_IDENTIDADES = [
+    ('youtube', re.compile(r'youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/)([A-Za-z0-9_-]{11})')),
+    ('youtube', re.compile(r'youtu\.be/([A-Za-z0-9_-]{11})')),
+    ('instagram', re.compile(r'instagram\.com/(?:(?!share/)[A-Za-z0-9_.]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)')),
+    ('tiktok', re.compile(r'tiktok\.com/(?:@[^/]+/(?:video|photo)/|v/|embed/(?:v2/)?)(\d+)')),
+    ('twitter', re.compile(r'(?:twitter|x)\.com/(?:[A-Za-z0-9_]+|i(?:/web)?)/status(?:es)?/(\d+)')),
+    ('facebook', re.compile(r'facebook\.com/(?:watch/?\?(?:.*&)?v=|video\.php\?(?:.*&)?v=|reel/|[^/?]+/videos/(?:[^/?]+/)?)(\d+)')),
+]
+_LISTA_YOUTUBE = re.compile(r'[?&]list=([A-Za-z0-9_-]+)')
+
+# Tabla de redirecciones: link corto -> (destino, vence_en)
+_MAX_ENTRADAS = 2000
+_TTL_SEGUNDOS = 24 * 3600
+# Si no se pudo resolver, no reintentar enseguida (pero sí más tarde)
+_TTL_FALLO_SEGUNDOS = 300
+_MAX_SALTOS = 6
+_TIMEOUT = 6
+_UA = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+       '(KHTML, like Gecko) Chrome/124.0 Safari/537.36')
+
+_tabla: "OrderedDict[str, tuple]" = OrderedDict()
+_lock = threading.Lock()
+_sesion = requests.Session()
+_sesion.headers['User-Agent'] = _UA
+
+STATS = {
+    "expanded": 0,
+    "table_hits": 0,
+    "failed": 0,
+}
+
+
+def es_corto(url):
+    """True si `url` es un link corto/de compartir que hay que expandir."""
+    parsed = urlparse(url if '://' in url else f'https://{url}')
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if any(p.match(host) for p in _CORTOS):
+        return True
+    ruta = f"{host}{parsed.path}"
+    return any(p.search(ruta) for p in _CORTOS_RUTA)
+
+
+def identidad(url):
+    """(plataforma, media_id) de una URL expandida, o None si no se reconoce."""
+    for plataforma, patron in _IDENTIDADES:
+        m = patron.search(url)
+        if m:
+            return plataforma, m.group(1)
+    return None
+
+
+def clave(url):
+    """Clave para cachés y deduplicación: 'plataforma:media_id' si se reconoce
+    la media, si no la URL tal cual. Un watch?v= de YouTube con &list= lleva
+    también la lista: yt-dlp baja la playlist entera, no solo ese video."""
+    ident = identidad(url)
+    if not ident:
+        return url
+    lista = _LISTA_YOUTUBE.search(url) if ident[0] == 'youtube' else None
+    if lista:
+        return f"{ident[0]}:{ident[1]}:list={lista.group(1)}"
+    return f"{ident[0]}:{ident[1]}"
+
+
+def expandir(url):
+    """Destino de un link corto (de la tabla si ya se resolvió). Cualquier otra
+    URL vuelve tal cual, igual que un link corto que no se pudo resolver."""
+    if not es_corto(url):
+        return url
+    ahora = time.time()
+    with _lock:
+        entrada = _tabla.get(url)
+        if entrada and entrada[1] > ahora:
+            _tabla.move_to_end(url)
+            STATS["table_hits"] += 1
+            return entrada[0]
+
+    destino = _resolver(url)
+    ttl = _TTL_SEGUNDOS if destino else _TTL_FALLO_SEGUNDOS
+    with _lock:
+        _tabla[url] = (destino or url, ahora + ttl)
+        _tabla.move_to_end(url)
+        while len(_tabla) > _MAX_ENTRADAS:
+            _tabla.popitem(last=False)
+    if destino:
+        STATS["expanded"] += 1
+        print(f"🔀 Link corto expandido: {url} → {destino}")
+        return destino
+    STATS["failed"] += 1
+    return url
+
+
+def stats():
+    with _lock:
+        tamano = len(_tabla)
+    return {**STATS, "redirect_table": tamano}
+
+
+# ---- Internos ----
+def _resolver(url):
+    """Sigue las redirecciones a mano, sin bajar cuerpos. Se queda con el primer
+    salto que ya identifica la media: algunos destinos finales son la pantalla
+    de login (Facebook) y ahí el id ya se perdió. None si no se pudo."""
+    actual = url
+    try:
+        for _ in range(_MAX_SALTOS):
+            if actual != url and identidad(actual):
+                return actual
+            resp = _sesion.head(actual, allow_redirects=False, timeout=_TIMEOUT)
+            if resp.status_code == 405:
+                # Hay acortadores que no aceptan HEAD
+                resp = _sesion.get(actual, allow_redirects=False, timeout=_TIMEOUT, stream=True)
+                resp.close()
+            siguiente = resp.headers.get('Location')
+            if not resp.is_redirect or not siguiente:
+                break
+            actual = urljoin(actual, siguiente)
+    except Exception as e:
+        print(f"⚠️ No se pudo expandir {url}: {e}")
+        return None
+    return actual if actual != url else None
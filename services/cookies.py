@@ -0,0 +1,154 @@
+"""
+cookies.py - Cookies de las plataformas, parseadas una vez y recargables en caliente.
+
+Antes IG_COOKIES se re-parseaba en cada pedido a Instagram, y las cookies de
+YouTube/Twitter se escribían a disco una sola vez al importar: cambiarlas
+obligaba a redeployar.
+
+Cada CookieSource lee su contenido Netscape de un archivo (p.ej. un Secret File
+de Render), de una variable de entorno o de un valor por defecto, en ese orden.
+Lo parsea una sola vez a un http.cookiejar y lo vuelve a cargar solo cuando la
+fuente cambia (mtime/tamaño del archivo o el valor de la variable), chequeando
+como mucho cada COOKIES_RELOAD_SECONDS. El mismo jar se comparte con requests e
+instaloader; yt-dlp lee el archivo `cookiefile`, que se reescribe en cada recarga.
+"""
+import http.cookiejar
+import os
+import threading
+import time
+
+from config import COOKIES_RELOAD_SECONDS
+from services import metrics
+
+SOURCES = metrics.Registro()
+
+_CABECERA = "# Netscape HTTP Cookie File"
+
+
+def _escribir_cookies(contenido, archivo):
+    """Escribe cookies a un archivo de forma atómica. Retorna la ruta absoluta."""
+    ruta_abs = os.path.abspath(archivo)
+    temporal = f"{ruta_abs}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(contenido)
+    os.replace(temporal, ruta_abs)
+    return ruta_abs
+
+
+class CookieSource:
+    """Un jar de cookies con su fuente. `path` y `env_var` se consultan en cada
+    chequeo, así un archivo o variable actualizados se toman sin reiniciar."""
+
+    def __init__(self, name, archivo_salida, path=None, env_var=None, default=""):
+        self.name = name
+        self.archivo_salida = archivo_salida
+        self.path = path
+        self.env_var = env_var
+        self.default = default
+        self._lock = threading.Lock()
+        self._jar = http.cookiejar.MozillaCookieJar()
+        self._cookiefile = None
+        self._firma = None
+        self._origen = None
+        self._chequeado = 0.0
+        self.version = 0
+        self._stats = {"reloads": 0, "errors": 0, "loaded_at": None}
+        SOURCES.agregar(name, self)
+
+    # ---- API pública ----
+    def jar(self):
+        """El CookieJar actual (lo recarga antes si la fuente cambió)."""
+        self.refresh()
+        return self._jar
+
+    def cookiefile(self):
+        """Ruta del archivo Netscape para yt-dlp, o None si no hay cookies."""
+        self.refresh()
+        return self._cookiefile
+
+    def get(self, nombre):
+        """Valor de la cookie `nombre` (cualquier dominio del jar), o None."""
+        for cookie in self.jar():
+            if cookie.name == nombre:
+                return cookie.value
+        return None
+
+    def configured(self):
+        self.refresh()
+        return self._origen is not None
+
+    def refresh(self):
+        """Recarga el jar si la fuente cambió (como mucho un chequeo cada
+        COOKIES_RELOAD_SECONDS). Después de esto `version` está al día."""
+        ahora = time.time()
+        if self._firma is not None and ahora - self._chequeado < COOKIES_RELOAD_SECONDS:
+            return
+        with self._lock:
+            if self._firma is not None and ahora - self._chequeado < COOKIES_RELOAD_SECONDS:
+                return
+            self._chequeado = ahora
+            origen, firma, contenido = self._leer_fuente()
+            if firma == self._firma and self._firma is not None:
+                return
+            try:
+                if origen == "file":
+                    with open(self.path, encoding='utf-8') as f:
+                        contenido = f.read().strip()
+                self._cargar(origen, contenido)
+            except Exception as e:
+                # Se conserva el jar anterior: mejor cookies viejas que ninguna
+                self._stats["errors"] += 1
+                print(f"⚠️ Cookies {self.name}: no se pudieron cargar desde {origen}: {e}")
+            # Aunque falle, no se reintenta hasta que la fuente vuelva a cambiar
+            self._firma = firma or ("none",)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "source": self._origen,
+                "version": self.version,
+                "cookies": len(self._jar),
+            }
+
+    # ---- Internos ----
+    def _leer_fuente(self):
+        """(origen, firma, contenido) de la fuente de mayor prioridad disponible.
+        El contenido del archivo solo se lee si la firma cambió."""
+        if self.path:
+            try:
+                st = os.stat(self.path)
+                return "file", ("file", self.path, st.st_mtime_ns, st.st_size), None
+            except OSError:
+                pass
+        if self.env_var:
+            valor = os.environ.get(self.env_var, '').strip()
+            if valor:
+                return "env", ("env", valor), valor
+        if self.default.strip():
+            return "default", ("default",), self.default.strip()
+        return None, None, ""
+
+    def _cargar(self, origen, contenido):
+        if not contenido:
+            self._jar = http.cookiejar.MozillaCookieJar()
+            self._cookiefile = None
+            self._origen = None
+        else:
+            # MozillaCookieJar exige la cabecera; los exports pegados a mano a veces no la traen
+            if not contenido.startswith(_CABECERA):
+                contenido = f"{_CABECERA}\n{contenido}"
+            ruta = _escribir_cookies(contenido + "\n", self.archivo_salida)
+            jar = http.cookiejar.MozillaCookieJar(ruta)
+            jar.load(ignore_discard=True, ignore_expires=True)
+            self._jar = jar
+            self._cookiefile = ruta
+            self._origen = origen
+        self.version += 1
+        self._stats["reloads"] += 1
+        self._stats["loaded_at"] = int(time.time())
+        print(f"🍪 Cookies {self.name}: {len(self._jar)} cargadas desde {origen or 'ninguna fuente'} "
+              f"(versión {self.version})")
+
+
+stats = SOURCES.stats
@@ -0,0 +1,206 @@
+"""
+disk_janitor.py - Cuota de disco y barrido de huérfanos en downloads/.
+
+Los trabajos fallidos podían dejar `.part`, restos de `ig_temp` o archivos cuyo
+os.remove falló en silencio, y el disco efímero de Render se iba llenando. Un
+hilo en segundo plano recorre downloads/ al arrancar y cada tanto:
+
+1. Borra lo huérfano (nadie lo está usando) con más de MONKEY_DISK_ORPHAN_MINUTES.
+2. Si el total supera MONKEY_DISK_QUOTA_MB, desaloja primero los resultados
+   terminados que esperan sin uso (p.ej. un prefetch que nadie aceptó), del menos
+   usado al más reciente, y si no alcanza borra huérfanos aunque sean nuevos.
+
+Nunca toca una carpeta protegida: la de un trabajo que está descargando o
+cuyos archivos se están enviando.
+"""
+import os
+import shutil
+import threading
+import time
+
+from config import MONKEY_DISK_QUOTA_MB, MONKEY_DISK_ORPHAN_MINUTES, MONKEY_DISK_SWEEP_SECONDS
+
+DOWNLOADS_DIR = 'downloads'
+
+# Algo recién creado puede no estar protegido todavía: margen antes de tocarlo
+_GRACIA_SEGUNDOS = 60
+
+_lock = threading.Lock()
+_protegidas = set()        # rutas absolutas de carpetas en uso
+_desalojables = {}         # clave -> {"carpetas": set, "ts": float, "desalojar": callable}
+_hilo = None
+
+STATS = {
+    "sweeps": 0,
+    "orphans_removed": 0,
+    "evicted": 0,
+    "bytes_freed": 0,
+    "usage_bytes": 0,
+    "last_sweep": None,
+}
+
+
+def _abs(carpeta):
+    return os.path.abspath(carpeta)
+
+
+# ---- API pública ----
+def proteger(carpeta):
+    """Marca una carpeta como en uso: el barrido no la toca."""
+    with _lock:
+        _protegidas.add(_abs(carpeta))
+    iniciar()
+
+
+def soltar(carpeta):
+    """La carpeta dejó de usarse (normalmente porque ya se borró)."""
+    with _lock:
+        _protegidas.discard(_abs(carpeta))
+
+
+def desalojable(clave, archivos, desalojar):
+    """Registra un resultado terminado que espera sin uso. Si hace falta lugar,
+    se llama a `desalojar()`, que debe soltar esos archivos."""
+    carpetas = {_abs(os.path.dirname(a)) for a in archivos}
+    with _lock:
+        _desalojables[clave] = {"carpetas": carpetas, "ts": time.time(), "desalojar": desalojar}
+
+
+def no_desalojable(clave):
+    """El resultado se va a usar (o ya se soltó): sacarlo de los desalojables."""
+    with _lock:
+        _desalojables.pop(clave, None)
+
+
+def barrer():
+    """Una pasada completa: huérfanos viejos y, si hace falta, cuota."""
+    if not os.path.isdir(DOWNLOADS_DIR):
+        return
+    ahora = time.time()
+    entradas = _entradas()
+    cuota = MONKEY_DISK_QUOTA_MB * 1024 * 1024
+
+    with _lock:
+        protegidas = set(_protegidas)
+    libres = [e for e in entradas if e["ruta"] not in protegidas]
+
+    # 1) Huérfanos viejos
+    for e in libres:
+        if ahora - e["mtime"] > MONKEY_DISK_ORPHAN_MINUTES * 60:
+            if _borrar(e, "huérfano"):
+                STATS["orphans_removed"] += 1
+    total = sum(e["bytes"] for e in entradas if os.path.exists(e["ruta"]))
+
+    # 2) Cuota: primero resultados terminados sin uso (LRU)...
+    if total > cuota:
+        with _lock:
+            candidatos = sorted(_desalojables.items(), key=lambda kv: kv[1]["ts"])
+        por_ruta = {e["ruta"]: e["bytes"] for e in entradas}
+        for clave, d in candidatos:
+            if total <= cuota:
+                break
+            no_desalojable(clave)
+            liberado = sum(por_ruta.get(c, 0) for c in d["carpetas"])
+            print(f"🧹 Disco: desalojando resultado sin uso {clave} ({liberado / (1024 * 1024):.1f} MB)")
+            try:
+                d["desalojar"]()
+            except Exception as e:
+                print(f"⚠️ Disco: error desalojando {clave}: {e}")
+                continue
+            STATS["evicted"] += 1
+            STATS["bytes_freed"] += liberado
+            total -= liberado
+
+    # ...y después huérfanos aunque sean nuevos, del más viejo al más nuevo
+    if total > cuota:
+        for e in sorted(libres, key=lambda e: e["mtime"]):
+            if total <= cuota:
+                break
+            if not os.path.exists(e["ruta"]) or ahora - e["mtime"] < _GRACIA_SEGUNDOS:
+                continue
+            if _borrar(e, "cuota excedida"):
+                STATS["orphans_removed"] += 1
+                total -= e["bytes"]
+        if total > cuota:
+            print(f"⚠️ Disco: {total / (1024 * 1024):.0f} MB en {DOWNLOADS_DIR}/ "
+                  f"(cuota {MONKEY_DISK_QUOTA_MB} MB), todo lo demás está en uso")
+
+    STATS["sweeps"] += 1
+    STATS["usage_bytes"] = max(0, total)
+    STATS["last_sweep"] = int(ahora)
+
+
+def iniciar():
+    """Arranca el hilo del barrido (la primera pasada es inmediata). Idempotente."""
+    global _hilo
+    with _lock:
+        if _hilo:
+            return
+        _hilo = threading.Thread(target=_loop, name="disk-janitor", daemon=True)
+    _hilo.start()
+
+
+def stats():
+    with _lock:
+        protegidas, desalojables = len(_protegidas), len(_desalojables)
+    return {
+        **STATS,
+        "usage_mb": round(STATS["usage_bytes"] / (1024 * 1024), 1),
+        "quota_mb": MONKEY_DISK_QUOTA_MB,
+        "orphan_minutes": MONKEY_DISK_ORPHAN_MINUTES,
+        "protected_dirs": protegidas,
+        "evictable_results": desalojables,
+    }
+
+
+# ---- Internos ----
+def _entradas():
+    """Cada entrada directa de downloads/ con su peso y su última modificación
+    (la más reciente de todo lo que contiene)."""
+    entradas = []
+    for nombre in os.listdir(DOWNLOADS_DIR):
+        ruta = _abs(os.path.join(DOWNLOADS_DIR, nombre))
+        try:
+            st = os.stat(ruta)
+        except OSError:
+            continue
+        peso, mtime = st.st_size, st.st_mtime
+        if os.path.isdir(ruta):
+            peso = 0
+            for raiz, _, archivos in os.walk(ruta):
+                for a in archivos:
+                    try:
+                        sa = os.stat(os.path.join(raiz, a))
+                    except OSError:
+                        continue
+                    peso += sa.st_size
+                    mtime = max(mtime, sa.st_mtime)
+        entradas.append({"ruta": ruta, "bytes": peso, "mtime": mtime})
+    return entradas
+
+
+def _borrar(entrada, motivo):
+    """Borra una entrada de downloads/. True si se borró."""
+    ruta = entrada["ruta"]
+    try:
+        if os.path.isdir(ruta):
+            shutil.rmtree(ruta)
+        else:
+            os.remove(ruta)
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        print(f"⚠️ Disco: no se pudo borrar {ruta}: {e}")
+        return False
+    STATS["bytes_freed"] += entrada["bytes"]
+    print(f"🧹 Disco: borrado {os.path.basename(ruta)} ({motivo}, {entrada['bytes'] / (1024 * 1024):.1f} MB)")
+    return True
+
+
+def _loop():
+    while True:
+        try:
+            barrer()
+        except Exception as e:
+            print(f"⚠️ Disco: error en el barrido: {e}")
+        time.sleep(MONKEY_DISK_SWEEP_SECONDS)
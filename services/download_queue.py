@@ -0,0 +1,130 @@
+"""
+download_queue.py - Pool acotado de workers para las descargas del Monkey.
+
+Los handlers de telebot corren en pocos hilos: si cada descarga se hace ahí
+mismo, unos cuantos videos lentos de YouTube/Instagram bloquean a todos los
+demás usuarios. Esta cola recibe los trabajos, devuelve enseguida la posición en
+la fila y los ejecuta en un número fijo de workers propios.
+
+Cada trabajo puede traer un callback `on_position(pos)` que se llama cada vez que
+cambia su lugar en la fila (0 = empezó a ejecutarse), para avisarle al usuario.
+"""
+import threading
+import time
+from collections import deque
+
+from services import metrics
+
+QUEUES = metrics.Registro()
+
+
+class _Job:
+    __slots__ = ("fn", "on_position", "enqueued_at", "position")
+
+    def __init__(self, fn, on_position):
+        self.fn = fn
+        self.on_position = on_position
+        self.enqueued_at = time.time()
+        self.position = None
+
+
+class DownloadQueue:
+    """Cola FIFO acotada con `workers` hilos daemon (arrancan en el primer submit)."""
+
+    def __init__(self, name, workers, max_pending):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.max_pending = max(0, int(max_pending))
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._busy = 0
+        self._threads = []
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self._wait_total = 0.0
+        QUEUES.agregar(name, self)
+
+    # ---- API pública ----
+    def submit(self, fn, on_position=None):
+        """Encola `fn`. Retorna la posición en la fila (0 = arranca ya) o None si
+        la cola está llena. Nunca bloquea al que llama."""
+        with self._cond:
+            self._start_workers()
+            libres = max(0, self.workers - self._busy)
+            if len(self._pending) - libres >= self.max_pending:
+                self._stats["rejected"] += 1
+                return None
+            job = _Job(fn, on_position)
+            self._pending.append(job)
+            self._stats["submitted"] += 1
+            posicion = max(0, len(self._pending) - libres)
+            job.position = posicion
+            self._cond.notify()
+        return posicion
+
+    def stats(self):
+        with self._cond:
+            terminados = self._stats["completed"] + self._stats["failed"]
+            return {
+                **self._stats,
+                "workers": self.workers,
+                "busy": self._busy,
+                "utilisation": round(self._busy / self.workers, 2),
+                "queue_depth": len(self._pending),
+                "queue_max": self.max_pending,
+                "avg_wait_seconds": round(self._wait_total / terminados, 2) if terminados else 0.0,
+            }
+
+    # ---- Internos ----
+    def _start_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"{self.name}-worker-{i + 1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._pending.popleft()
+                self._busy += 1
+                self._wait_total += time.time() - job.enqueued_at
+                # Los que siguen en la fila avanzan un lugar
+                cambios = []
+                for i, otro in enumerate(self._pending):
+                    nueva = max(0, i + 1 - max(0, self.workers - self._busy))
+                    if nueva != otro.position:
+                        otro.position = nueva
+                        cambios.append(otro)
+                if job.position:
+                    job.position = 0
+                    cambios.insert(0, job)
+
+            # Avisos fuera del lock: editan mensajes de Telegram (red)
+            for otro in cambios:
+                self._notify(otro)
+
+            try:
+                job.fn()
+                ok = True
+            except Exception as e:
+                ok = False
+                print(f"❌ {self.name}: trabajo falló: {type(e).__name__}: {e}")
+
+            with self._cond:
+                self._busy -= 1
+                self._stats["completed" if ok else "failed"] += 1
+
+    @staticmethod
+    def _notify(job):
+        if not job.on_position:
+            return
+        try:
+            job.on_position(job.position)
+        except Exception as e:
+            print(f"⚠️ Error avisando posición en la fila: {e}")
+
+
+stats = QUEUES.stats
@@ -3,18 +3,34 @@ downloader.py - Lógica de descarga de medios.
 Soporta: YouTube, Instagram, TikTok, Twitter/X, Facebook.
 Usa yt-dlp como motor principal e instaloader como primario para Instagram.
 """
+import copy
 import os
 import re
-import glob
 import shutil
+import tempfile
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
 
 import requests
-import yt_dlp
+from requests.adapters import HTTPAdapter
 import instaloader
 import urllib3
 
-from config import IG_USERNAME, IG_PASSWORD, IG_COOKIES_RAW
+from config import (
+    IG_USERNAME, IG_PASSWORD,
+    IG_COOKIES_PATH, TWITTER_COOKIES_PATH, YOUTUBE_COOKIES_PATH,
+    MONKEY_REENCODE, MONKEY_REENCODE_MAX_SOURCE_MB,
+)
+from services.video_reencode import reencodar_a_tamano
+from services import ig_session_store, ranged_download, disk_janitor, canonical, probe_cache
+from services import fragment_budget
+from services.cookies import CookieSource
+from services.strategy_health import StrategyHealth
+from services.ydl_pool import YdlPool
 
 # =============================================
 # COOKIES HARDCODEADAS (Twitter/X y YouTube)
@@ -70,26 +86,25 @@ YOUTUBE_COOKIES_RAW = """# Netscape HTTP Cookie File
 
 
 # =============================================
-# FUNCIONES DE COOKIES
+# FUENTES DE COOKIES
 # =============================================
-def _escribir_cookies(contenido, archivo):
-    """Escribe cookies a un archivo y verifica que se creó correctamente."""
-    try:
-        with open(archivo, 'w', encoding='utf-8') as f:
-            f.write(contenido)
-        ruta_abs = os.path.abspath(archivo)
-        size = os.path.getsize(ruta_abs)
-        print(f"🍪 Cookies escritas en {ruta_abs} ({size} bytes)")
-        return ruta_abs
-    except Exception as e:
-        print(f"⚠️ Error escribiendo cookies en {archivo}: {e}")
-        return None
+# Se parsean una vez y se recargan solas si cambia el archivo o la variable
+# (ver services/cookies.py). Las hardcodeadas quedan como valor por defecto.
+cookies_twitter = CookieSource('twitter', 'twitter_cookies.txt',
+                               path=TWITTER_COOKIES_PATH, default=TWITTER_COOKIES_RAW)
+cookies_youtube = CookieSource('youtube', 'youtube_cookies.txt',
+                               path=YOUTUBE_COOKIES_PATH, default=YOUTUBE_COOKIES_RAW)
+cookies_instagram = CookieSource('instagram', 'instagram_cookies.txt',
+                                 path=IG_COOKIES_PATH, env_var='IG_COOKIES')
 
 
-# Escribir archivos de cookies al importar este módulo
-TWITTER_COOKIES_FILE = _escribir_cookies(TWITTER_COOKIES_RAW.strip(), 'twitter_cookies.txt')
-YOUTUBE_COOKIES_FILE = _escribir_cookies(YOUTUBE_COOKIES_RAW.strip(), 'youtube_cookies.txt')
-IG_COOKIES_FILE = _escribir_cookies(IG_COOKIES_RAW.strip(), 'instagram_cookies.txt') if IG_COOKIES_RAW.strip() else None
+def _fuente_cookies(plataforma):
+    if plataforma == 'twitter':
+        return cookies_twitter
+    if plataforma == 'instagram':
+        return cookies_instagram
+    # YDL_OPTS (y lo que hereda de él) siempre usó las de YouTube
+    return cookies_youtube
 
 
 # =============================================
@@ -124,18 +139,11 @@ YDL_OPTS = {
     'fragment_retries': 5,
 }
 
-# Aplicar cookies de YouTube
-if YOUTUBE_COOKIES_FILE:
-    YDL_OPTS['cookiefile'] = YOUTUBE_COOKIES_FILE
-
 # Opciones específicas para X/Twitter
 YDL_OPTS_TWITTER = {
     **YDL_OPTS,
     'format': 'best[ext=mp4]/best',
 }
-# Aplicar cookies de Twitter (OBLIGATORIO - guest tokens ya no funcionan)
-if TWITTER_COOKIES_FILE:
-    YDL_OPTS_TWITTER['cookiefile'] = TWITTER_COOKIES_FILE
 
 # Opciones específicas para Instagram (NSFW requiere autenticación)
 YDL_OPTS_INSTAGRAM = {
@@ -143,8 +151,6 @@ YDL_OPTS_INSTAGRAM = {
     # Acepta video O imagen: un carrusel solo de fotos no puede usar best[ext=mp4]
     'format': 'best/bestvideo+bestaudio',
 }
-if IG_COOKIES_FILE:
-    YDL_OPTS_INSTAGRAM['cookiefile'] = IG_COOKIES_FILE
 
 # Opciones específicas para TikTok (acepta videos + imágenes de carrusel)
 YDL_OPTS_TIKTOK = {
@@ -159,69 +165,290 @@ YDL_OPTS_TIKTOK = {
 }
 
 
+
+def _perfil_audio(opciones):
+    """El mismo perfil, pero bajando solo el audio (comando /audio).
+    preferredcodec 'best' copia el stream tal cual (m4a/opus) sin re-encodear;
+    si la plataforma no tiene audio suelto, se baja el video y se le saca el audio."""
+    audio = {
+        **opciones,
+        'format': 'bestaudio[ext=m4a]/bestaudio/best',
+        'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'best'}],
+    }
+    audio.pop('merge_output_format', None)
+    return audio
+
+
+# Instancias de YoutubeDL reutilizables por perfil (ver services/ydl_pool.py).
+# El perfil por defecto también atiende Facebook y lo que no se reconozca.
+YDL_POOLS = {
+    'default': YdlPool('default', YDL_OPTS, _fuente_cookies('youtube'), extractores=('Youtube', 'Facebook')),
+    'twitter': YdlPool('twitter', YDL_OPTS_TWITTER, _fuente_cookies('twitter'), extractores=('Twitter',)),
+    'instagram': YdlPool('instagram', YDL_OPTS_INSTAGRAM, _fuente_cookies('instagram'), extractores=('Instagram',)),
+    'tiktok': YdlPool('tiktok', YDL_OPTS_TIKTOK, _fuente_cookies('tiktok'), extractores=('TikTok',)),
+}
+YDL_POOLS_AUDIO = {
+    nombre: YdlPool(f'{nombre}-audio', _perfil_audio(pool.opciones), pool.cookies, pool.extractores)
+    for nombre, pool in YDL_POOLS.items()
+}
+
+
 # =============================================
 # INSTALOADER
 # =============================================
-IL = instaloader.Instaloader(
-    download_videos=True,
-    download_video_thumbnails=False,
-    download_geotags=False,
-    download_comments=False,
-    save_metadata=False,
-    compress_json=False,
-    post_metadata_txt_pattern='',
-)
-
-# Login de instaloader si hay credenciales de Instagram
-if IG_USERNAME and IG_PASSWORD:
+def _nuevo_instaloader():
+    return instaloader.Instaloader(
+        download_videos=True,
+        download_video_thumbnails=False,
+        download_geotags=False,
+        download_comments=False,
+        save_metadata=False,
+        compress_json=False,
+        post_metadata_txt_pattern='',
+    )
+
+
+# IL es la instancia principal: la que hace login y guarda la sesión. Las
+# descargas usan instancias del pool (ver _instaloader_prestado) que copian esa
+# misma sesión, cada una con su propia carpeta destino.
+IL = _nuevo_instaloader()
+# Sube cada vez que cambia la sesión de IL, para que el pool la vuelva a copiar
+_il_sesion_version = 0
+
+# La sesión NO se inicia al importar: login/test_login son idas y vueltas de red
+# que frenaban cada arranque. Se restaura en el primer uso de Instagram
+# (asegurar_sesion_instagram) y se valida en segundo plano.
+_il_sesion_lock = threading.Lock()
+_il_sesion_iniciada = False
+# Versión de cookies_instagram con la que se intentó cargar la sesión, y si la
+# sesión activa salió de esas cookies (entonces se recarga cuando cambian)
+_il_cookies_version = None
+_il_sesion_desde_cookies = False
+
+
+def _login_con_password():
+    """Login de instaloader con IG_USERNAME/IG_PASSWORD (red). True si entró."""
+    global _il_sesion_version
     try:
         IL.login(IG_USERNAME, IG_PASSWORD)
+        _il_sesion_version += 1
         print(f"✅ Instagram: instaloader logueado como {IG_USERNAME}")
+        ig_session_store.save_session(IG_USERNAME, IL.save_session())
+        return True
     except Exception as e:
         print(f"⚠️ Instagram: no se pudo hacer login con instaloader: {e}")
         print("  → Se usarán cookies para yt-dlp como fallback")
+        return False
 
 
-def _cookies_instagram_dict():
-    """Parsea IG_COOKIES (formato Netscape) a un dict {nombre: valor}."""
-    cookies = {}
-    for linea in IG_COOKIES_RAW.splitlines():
-        linea = linea.strip()
-        if not linea or linea.startswith('#'):
-            continue
-        partes = linea.split('\t')
-        if len(partes) >= 7 and 'instagram' in partes[0]:
-            cookies[partes[5]] = partes[6]
-    return cookies
+def _restaurar_sesion_guardada():
+    """Carga la sesión persistida de IG_USERNAME sin tocar Instagram."""
+    global _il_sesion_version
+    if not IG_USERNAME:
+        return False
+    sesion = ig_session_store.load_session(IG_USERNAME)
+    if not sesion:
+        return False
+    try:
+        IL.load_session(IG_USERNAME, sesion)
+    except Exception as e:
+        print(f"⚠️ Instagram: la sesión guardada no se pudo cargar: {e}")
+        return False
+    _il_sesion_version += 1
+    print(f"✅ Instagram: sesión de instaloader restaurada para {IG_USERNAME} (sin login)")
+    return True
+
+
+def _validar_sesion_en_fondo():
+    """Comprueba la sesión restaurada; si Instagram ya no la acepta, vuelve a
+    loguear (password o cookies) y guarda la nueva."""
+    try:
+        if IL.test_login():
+            print("✅ Instagram: sesión restaurada validada")
+            return
+    except Exception as e:
+        print(f"⚠️ Instagram: no se pudo validar la sesión restaurada: {e}")
+        return
+    print("⚠️ Instagram: la sesión guardada expiró, iniciando sesión de nuevo...")
+    ig_session_store.delete_session(IG_USERNAME)
+    IL.context.username = None
+    with _il_sesion_lock:
+        _iniciar_sesion_nueva()
+
+
+def _iniciar_sesion_nueva():
+    if IG_USERNAME and IG_PASSWORD and _login_con_password():
+        return
+    _cargar_sesion_instaloader_desde_cookies()
 
 
-def _cargar_sesion_instaloader_desde_cookies():
+def asegurar_sesion_instagram():
+    """Deja lista la sesión de instaloader la primera vez que se usa Instagram.
+    Con sesión guardada no hay red: se restaura y se valida en segundo plano."""
+    global _il_sesion_iniciada
+    if _il_sesion_iniciada:
+        _recargar_sesion_si_cambiaron_cookies()
+        return
+    with _il_sesion_lock:
+        if _il_sesion_iniciada:
+            return
+        _il_sesion_iniciada = True
+        if _restaurar_sesion_guardada():
+            threading.Thread(target=_validar_sesion_en_fondo,
+                             name="ig-session-check", daemon=True).start()
+        else:
+            _iniciar_sesion_nueva()
+
+
+def _recargar_sesion_si_cambiaron_cookies():
+    """Si IG_COOKIES cambió y la sesión de instaloader salía de esas cookies (o
+    no había sesión), la vuelve a cargar con las nuevas."""
+    cookies_instagram.refresh()
+    if cookies_instagram.version == _il_cookies_version:
+        return
+    if IL.context.is_logged_in and not _il_sesion_desde_cookies:
+        return
+    with _il_sesion_lock:
+        if cookies_instagram.version != _il_cookies_version:
+            print("🍪 Instagram: cookies nuevas, recargando la sesión de instaloader...")
+            _cargar_sesion_instaloader_desde_cookies(forzar=True)
+
+
+def _cargar_sesion_instaloader_desde_cookies(forzar=False):
     """Carga la sesión de instaloader desde IG_COOKIES cuando no hay login por
     usuario/contraseña. Sin sesión, Instagram responde 401 a instaloader y los
     carruseles fallan aunque las cookies sí estén configuradas (solo las usaba
     yt-dlp, que no soporta carruseles de imágenes)."""
-    if IL.context.is_logged_in or not IG_COOKIES_RAW.strip():
+    global _il_sesion_version, _il_cookies_version, _il_sesion_desde_cookies
+    if IL.context.is_logged_in and not forzar:
+        return
+    configuradas = cookies_instagram.configured()
+    _il_cookies_version = cookies_instagram.version
+    if not configuradas:
         return
 
-    cookies = _cookies_instagram_dict()
-
-    if 'sessionid' not in cookies:
+    if not cookies_instagram.get('sessionid'):
         print("⚠️ Instagram: IG_COOKIES no contiene 'sessionid'; instaloader seguirá anónimo")
         return
 
     try:
-        IL.context._session.cookies.update(cookies)
+        IL.context._session.cookies.update(cookies_instagram.jar())
         username = IL.test_login()
         if username:
             IL.context.username = username
+            _il_sesion_version += 1
+            _il_sesion_desde_cookies = True
             print(f"✅ Instagram: sesión de instaloader cargada desde cookies como {username}")
+            if IG_USERNAME:
+                ig_session_store.save_session(IG_USERNAME, IL.save_session())
         else:
+            if _il_sesion_desde_cookies:
+                IL.context.username = None
+                _il_sesion_version += 1
             print("⚠️ Instagram: el sessionid de IG_COOKIES expiró o no es válido para instaloader")
     except Exception as e:
         print(f"⚠️ Instagram: no se pudo cargar la sesión desde cookies: {e}")
 
 
-_cargar_sesion_instaloader_desde_cookies()
+# Pool de instancias de instaloader para descargas concurrentes. Cada una se
+# presta a un solo trabajo a la vez (dirname_pattern es estado de la instancia).
+IL_POOL_SIZE = 3
+_il_libres = queue.LifoQueue()
+_il_creados = 0
+_il_pool_lock = threading.Lock()
+
+
+def _sincronizar_sesion(L):
+    """Copia la sesión autenticada de IL a una instancia del pool si cambió."""
+    version = _il_sesion_version
+    if getattr(L, '_monkey_sesion_version', None) == version:
+        return
+    if IL.context.is_logged_in:
+        L.load_session(IL.context.username, IL.save_session())
+    L._monkey_sesion_version = version
+
+
+@contextmanager
+def _instaloader_prestado():
+    """Presta una instancia del pool (creándola si hay lugar, o esperando a que
+    se libere una) ya sincronizada con la sesión de IL."""
+    global _il_creados
+    try:
+        L = _il_libres.get_nowait()
+    except queue.Empty:
+        L = None
+        with _il_pool_lock:
+            if _il_creados < IL_POOL_SIZE:
+                _il_creados += 1
+                L = _nuevo_instaloader()
+        if L is None:
+            L = _il_libres.get()
+    try:
+        _sincronizar_sesion(L)
+        yield L
+    finally:
+        _il_libres.put(L)
+
+
+# =============================================
+# DIRECTORIOS POR TRABAJO
+# =============================================
+# Cada descarga trabaja en su propia carpeta dentro de downloads/. Así dos trabajos
+# concurrentes nunca se reclaman los archivos del otro, y encontrar lo descargado
+# no depende de cuántos archivos haya en disco.
+# disk_janitor protege la carpeta mientras el trabajo la usa y barre lo que quede
+# huérfano (p.ej. si un borrado falla).
+DOWNLOADS_DIR = disk_janitor.DOWNLOADS_DIR
+
+
+def _nuevo_directorio_job():
+    """Crea una carpeta única para un trabajo de descarga."""
+    os.makedirs(DOWNLOADS_DIR, exist_ok=True)
+    carpeta = tempfile.mkdtemp(prefix='job_', dir=DOWNLOADS_DIR)
+    disk_janitor.proteger(carpeta)
+    return carpeta
+
+
+def _borrar_directorio(carpeta):
+    try:
+        shutil.rmtree(carpeta)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"⚠️ No se pudo borrar {carpeta}: {e}")
+    disk_janitor.soltar(carpeta)
+
+
+def liberar_archivos(archivos):
+    """Borra los archivos de una descarga y la carpeta de su trabajo.
+    Es la contraparte de descargar_media(): llamarla cuando ya se enviaron."""
+    carpetas = set()
+    for arch in archivos:
+        carpeta = os.path.dirname(arch)
+        if os.path.basename(carpeta).startswith('job_'):
+            carpetas.add(carpeta)
+        try:
+            os.remove(arch)
+        except:
+            pass
+    for carpeta in carpetas:
+        _borrar_directorio(carpeta)
+
+
+def _archivos_de_info(info):
+    """Rutas finales de lo que descargó yt-dlp según el info dict
+    (requested_downloads, recorriendo también las entries de playlists/carruseles)."""
+    archivos = []
+    if not info:
+        return archivos
+    for entry in info.get('entries') or []:
+        if entry:
+            archivos += _archivos_de_info(entry)
+    for descarga in info.get('requested_downloads') or []:
+        ruta = descarga.get('filepath') or descarga.get('_filename')
+        if ruta:
+            archivos.append(ruta)
+    return archivos
 
 
 # =============================================
@@ -241,6 +468,65 @@ IG_UA = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
          '(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36')
 _SHORTCODE_ALFABETO = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
 
+# Sesión keep-alive compartida para la API (i.instagram.com) y la CDN: un
+# carrusel de 20 items ya no paga 20 handshakes TLS.
+IG_DESCARGAS_POR_HOST = 4
+IG_FETCH_WORKERS = 8
+_IG_SESSION = requests.Session()
+_IG_SESSION.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=IG_FETCH_WORKERS))
+_ig_fetch_pool = ThreadPoolExecutor(max_workers=IG_FETCH_WORKERS, thread_name_prefix='ig-fetch')
+_semaforos_host = {}
+_semaforos_lock = threading.Lock()
+
+
+def _semaforo_host(url):
+    """Semáforo por host de la CDN: tope de descargas simultáneas a cada uno."""
+    host = urlparse(url).hostname or ''
+    with _semaforos_lock:
+        if host not in _semaforos_host:
+            _semaforos_host[host] = threading.BoundedSemaphore(IG_DESCARGAS_POR_HOST)
+        return _semaforos_host[host]
+
+
+class _ProgresoAgregado:
+    """Suma el avance de varias descargas en paralelo (los items de un carrusel)
+    y lo reporta a `progreso(descargados, total, velocidad, eta)` como uno solo."""
+
+    def __init__(self, progreso):
+        self._progreso = progreso
+        self._lock = threading.Lock()
+        self._inicio = time.time()
+        self._bytes = 0
+        self._totales = {}
+
+    def item(self, i):
+        """Callback para ranged_download de un item: (bytes_nuevos, total)."""
+        def _sumar(nuevos, total):
+            with self._lock:
+                self._bytes += nuevos
+                if total:
+                    self._totales[i] = total
+                descargados, total_conocido = self._bytes, sum(self._totales.values())
+            velocidad = descargados / max(0.001, time.time() - self._inicio)
+            eta = (total_conocido - descargados) / velocidad if total_conocido and velocidad else None
+            self._progreso(descargados, total_conocido or None, velocidad, eta)
+        return _sumar
+
+
+def _bajar_media_ig(i, media_url, destino, progreso=None):
+    """Baja un item del carrusel. Retorna la ruta o None si falló."""
+    try:
+        with _semaforo_host(media_url):
+            # Si la conexión se corta, el reintento pide solo los bytes que faltan
+            ranged_download.descargar(_IG_SESSION, media_url, destino,
+                                      headers={'User-Agent': IG_UA}, timeout=120,
+                                      progreso=progreso)
+        print(f"  ✅ {destino}")
+        return destino
+    except Exception as e:
+        print(f"  ❌ No se pudo bajar media {i}: {e}")
+        return None
+
 
 def _shortcode_a_pk(shortcode):
     """Convierte un shortcode de Instagram a su pk numérico (base 64).
@@ -251,19 +537,18 @@ def _shortcode_a_pk(shortcode):
     return pk
 
 
-def descargar_instagram_api(url):
+def descargar_instagram_api(url, carpeta, progreso=None):
     """Descarga un post/carrusel de Instagram con la API web oficial usando
     las cookies de IG_COOKIES. Es el mismo endpoint que usa yt-dlp cuando hay
     sessionid, pero a diferencia de yt-dlp también descarga las FOTOS de los
-    carruseles (yt-dlp solo extrae videos).
+    carruseles (yt-dlp solo extrae videos). Los archivos quedan en `carpeta`.
 
     Retorna (archivos, error_code) igual que descargar_instagram()."""
     shortcode = extraer_shortcode(url)
     if not shortcode:
         return [], "bad_url"
 
-    cookies = _cookies_instagram_dict()
-    if 'sessionid' not in cookies:
+    if not cookies_instagram.get('sessionid'):
         return [], "no_cookies"
 
     headers = {
@@ -278,9 +563,9 @@ def descargar_instagram_api(url):
     print(f"📸 API web de Instagram: shortcode={shortcode} pk={pk}")
 
     try:
-        r = requests.get(
+        r = _IG_SESSION.get(
             f'https://i.instagram.com/api/v1/media/{pk}/info/',
-            headers=headers, cookies=cookies, timeout=30,
+            headers=headers, cookies=cookies_instagram.jar(), timeout=30,
         )
     except Exception as e:
         print(f"❌ API IG: error de conexión: {e}")
@@ -308,8 +593,8 @@ def descargar_instagram_api(url):
     medias = item.get('carousel_media') or [item]
     print(f"📸 API IG: {len(medias)} media(s) en el post")
 
-    os.makedirs('downloads', exist_ok=True)
-    archivos = []
+    agregado = _ProgresoAgregado(progreso) if progreso else None
+    tareas = []
     for i, media in enumerate(medias, 1):
         videos = media.get('video_versions') or []
         if videos:
@@ -323,26 +608,21 @@ def descargar_instagram_api(url):
         if not media_url:
             continue
 
-        destino = os.path.join('downloads', f'ig_{shortcode}_{i}.{ext}')
-        try:
-            with requests.get(media_url, headers={'User-Agent': IG_UA},
-                              stream=True, timeout=120) as resp:
-                resp.raise_for_status()
-                with open(destino, 'wb') as f:
-                    for chunk in resp.iter_content(256 * 1024):
-                        f.write(chunk)
-            archivos.append(destino)
-            print(f"  ✅ {destino}")
-        except Exception as e:
-            print(f"  ❌ No se pudo bajar media {i}: {e}")
+        destino = os.path.join(carpeta, f'ig_{shortcode}_{i}.{ext}')
+        tareas.append(_ig_fetch_pool.submit(_bajar_media_ig, i, media_url, destino,
+                                            agregado.item(i) if agregado else None))
+
+    # Las descargas corren en paralelo, pero el resultado respeta el orden del carrusel
+    archivos = [ruta for ruta in (t.result() for t in tareas) if ruta]
 
     if archivos:
         return archivos, None
     return [], "empty"
 
 
-def descargar_instagram(url):
+def descargar_instagram(url, carpeta):
     """Descarga un post de Instagram usando instaloader (videos e imágenes de carrusel).
+    Los archivos quedan en `carpeta`, la del trabajo.
 
     Retorna (archivos, error_code):
       - (lista, None) en éxito (lista vacía = no se descargó nada, error_code='empty')
@@ -359,22 +639,23 @@ def descargar_instagram(url):
     print(f"📸 Usando instaloader para shortcode: {shortcode}")
     print(f"📸 Login instaloader activo: {IL.context.is_logged_in}")
 
-    carpeta_temp = "downloads/ig_temp"
-    if os.path.exists(carpeta_temp):
-        shutil.rmtree(carpeta_temp)
+    # Subcarpeta propia del trabajo: instaloader deja ahí también .json/.txt
+    carpeta_temp = os.path.join(carpeta, 'ig_temp')
     os.makedirs(carpeta_temp, exist_ok=True)
 
     try:
-        post = instaloader.Post.from_shortcode(IL.context, shortcode)
-        print(f"📸 Post encontrado: is_video={post.is_video}, mediacount={post.mediacount}")
-        IL.dirname_pattern = carpeta_temp
-        IL.download_post(post, target="")
+        with _instaloader_prestado() as L:
+            post = instaloader.Post.from_shortcode(L.context, shortcode)
+            print(f"📸 Post encontrado: is_video={post.is_video}, mediacount={post.mediacount}")
+            L.dirname_pattern = carpeta_temp
+            L.download_post(post, target="")
 
         archivos = []
-        for f in sorted(glob.glob(os.path.join(carpeta_temp, '*'))):
+        for nombre in sorted(os.listdir(carpeta_temp)):
+            f = os.path.join(carpeta_temp, nombre)
             ext = f.lower()
             if ext.endswith(('.jpg', '.jpeg', '.png', '.webp', '.mp4')):
-                destino = os.path.join('downloads', os.path.basename(f))
+                destino = os.path.join(carpeta, nombre)
                 shutil.move(f, destino)
                 archivos.append(destino)
                 print(f"  ✅ {destino}")
@@ -424,7 +705,6 @@ def limpiar_url(url):
     if match:
         video_id = match.group(1)
         url = f"https://www.youtube.com/watch?v={video_id}"
-        print(f"🔄 Short convertido a: {url}")
         return url
 
     # youtu.be/ID → también normalizar
@@ -443,6 +723,36 @@ def limpiar_url(url):
     return url
 
 
+def extraer_urls(texto, dominios):
+    """Todos los links de `texto` que apuntan a alguno de `dominios`, en orden de
+    aparición y sin repetidos (dos links de la misma media cuentan como uno). Acepta links sin esquema ("youtu.be/xyz"), como los muestra Telegram."""
+    patron = (r'(?<![\w.-])(?:https?://)?(?:[\w-]+\.)*(?:'
+              + '|'.join(re.escape(d) for d in dominios)
+              + r')(?![\w-])(?:/[^\s<>"\']*)?')
+    urls, vistos = [], set()
+    for m in re.finditer(patron, texto or '', re.IGNORECASE):
+        url = m.group(0).rstrip('.,;:!?)]}>\'"')
+        if not url.lower().startswith(('http://', 'https://')):
+            url = 'https://' + url
+        # Sin expandir links cortos: esto corre en el handler y no hace red
+        clave = canonical.clave(limpiar_url(url))
+        if clave not in vistos:
+            vistos.add(clave)
+            urls.append(url)
+    return urls
+
+
+def canonizar(url):
+    """URL lista para descargar: link corto expandido y limpio (ver canonical)."""
+    return limpiar_url(canonical.expandir(limpiar_url(url)))
+
+
+def clave_media(url):
+    """Clave estable de la media ('instagram:C8aRs6CJvSD') para cachés y
+    deduplicación. Puede hacer red la primera vez que ve un link corto."""
+    return canonical.clave(canonizar(url))
+
+
 def detectar_plataforma(url):
     """Detecta la plataforma de una URL."""
     url_lower = url.lower()
@@ -452,74 +762,225 @@ def detectar_plataforma(url):
         return 'instagram'
     elif 'tiktok.com' in url_lower:
         return 'tiktok'
-    elif 'x.com' in url_lower or 'twitter.com' in url_lower:
+    elif 'x.com' in url_lower or 'twitter.com' in url_lower or re.search(r'(?:^|//)t\.co/', url_lower):
         return 'twitter'
     elif 'facebook.com' in url_lower or 'fb.watch' in url_lower or 'fb.gg' in url_lower:
         return 'facebook'
     return 'desconocida'
 
 
-def descargar_media(url, max_reintentos=2):
-    """Descarga media con yt-dlp. Para Instagram usa instaloader como primario."""
-    os.makedirs('downloads', exist_ok=True)
+def descargar_media(url, max_reintentos=2, limite_mb=None, reencodar=MONKEY_REENCODE, progreso=None,
+                    solo_audio=False):
+    """Descarga media con yt-dlp. Para Instagram usa instaloader como primario.
+
+    Con `limite_mb`, antes de bajar nada se sondean los formatos y se elige el
+    mejor que entra en ese peso; si ninguno entra, se rechaza sin descargar
+    (error que empieza con 'too_large'). Con `reencodar`, en vez de rechazar se
+    baja el formato más liviano y se re-encodea con ffmpeg hasta que entre.
+
+    Con `solo_audio` baja únicamente el audio (siempre con yt-dlp) y lo deja en
+    su códec original (.m4a, .opus...), sin re-encodear.
 
-    # Limpiar URL antes de pasarla a yt-dlp
-    url = limpiar_url(url)
+    Retorna (info, archivos, error). Los archivos viven en una carpeta propia del
+    trabajo: liberarlos con liberar_archivos() una vez enviados. Si no se descargó
+    nada, la carpeta ya se borró."""
+    # Expandir links cortos y limpiar la URL antes de pasarla a yt-dlp
+    original, url = url, canonizar(url)
+    if url != original.strip():
+        print(f"🔄 URL normalizada: {original.strip()} → {url}")
     plataforma = detectar_plataforma(url)
 
     print(f"🔗 Plataforma detectada: {plataforma}")
 
-    # Instagram: 1) API web con cookies (baja fotos Y videos de carruseles),
-    # 2) instaloader, 3) yt-dlp (solo videos)
+    carpeta = _nuevo_directorio_job()
+    info, archivos, error = _descargar_en(url, plataforma, carpeta, max_reintentos,
+                                          limite_mb, reencodar, progreso, solo_audio)
+    if archivos and limite_mb and reencodar:
+        _reencodar_pesados(archivos, limite_mb, info)
+    if not archivos:
+        _borrar_directorio(carpeta)
+    return info, archivos, error
+
+
+def _reencodar_pesados(archivos, limite_mb, info):
+    """Etapa post-descarga: re-encodea los .mp4 que superan `limite_mb`."""
+    duracion = (info or {}).get('duration') if len(archivos) == 1 else None
+    for arch in archivos:
+        try:
+            if not arch.lower().endswith('.mp4') or os.path.getsize(arch) <= limite_mb * 1024 * 1024:
+                continue
+        except OSError:
+            continue
+        reencodar_a_tamano(arch, limite_mb, duracion)
+
+
+def _descargar_en(url, plataforma, carpeta, max_reintentos, limite_mb, reencodar, progreso=None,
+                  solo_audio=False):
+    """Cuerpo de descargar_media() trabajando dentro de `carpeta`."""
+    if solo_audio:
+        # La API de Instagram e instaloader bajan el post entero: el audio va por yt-dlp
+        return _descargar_con_ytdlp(url, plataforma, carpeta, max_reintentos, limite_mb, reencodar,
+                                    progreso, solo_audio=True)
     if plataforma == 'instagram':
-        print("📸 Instagram: API web con cookies (primario)...")
-        archivos_api, err_api = descargar_instagram_api(url)
-        if archivos_api:
-            return None, archivos_api, None
-        # OJO: la API devuelve 404 también cuando el sessionid expiró, así que
-        # su "not_found" no es confiable → siempre probar los fallbacks
-        print(f"⚠️ API web no pudo ({err_api}), intentando instaloader...")
+        asegurar_sesion_instagram()
+        return _descargar_instagram_adaptativo(url, carpeta, max_reintentos, limite_mb, reencodar, progreso)
+    return _descargar_con_ytdlp(url, plataforma, carpeta, max_reintentos, limite_mb, reencodar, progreso)
+
+
+# Orden por defecto: 1) API web con cookies (baja fotos Y videos de carruseles),
+# 2) instaloader, 3) yt-dlp (solo videos). salud_instagram lo reordena según los
+# resultados recientes y saltea las que tienen el circuito abierto.
+ESTRATEGIAS_INSTAGRAM = ('api', 'instaloader', 'yt-dlp')
+salud_instagram = StrategyHealth("instagram")
+
+# Errores que no dicen nada de la salud de la estrategia (el link o la config)
+_ERRORES_NEUTROS = ("bad_url", "no_cookies")
+
+
+def _descargar_instagram_adaptativo(url, carpeta, max_reintentos, limite_mb, reencodar, progreso=None):
+    orden = salud_instagram.order(ESTRATEGIAS_INSTAGRAM)
+    if list(orden) != list(ESTRATEGIAS_INSTAGRAM):
+        print(f"📸 Instagram: orden adaptativo {' → '.join(orden)}")
+
+    error_ytdlp = None
+    errores = []
+    for estrategia in orden:
+        inicio = time.time()
+        if estrategia == 'api':
+            archivos, err = descargar_instagram_api(url, carpeta, progreso)
+            info = None
+        elif estrategia == 'instaloader':
+            archivos, err = descargar_instagram(url, carpeta)
+            info = None
+        else:
+            info, archivos, err = _descargar_con_ytdlp(
+                url, 'instagram', carpeta, max_reintentos, limite_mb, reencodar, progreso)
+        tardo = time.time() - inicio
 
-        archivos_inst, err_inst = descargar_instagram(url)
-        if archivos_inst:
-            return None, archivos_inst, None
-        if err_inst == "not_found":
-            return None, [], "Instagram: post no encontrado o eliminado"
-        # Cualquier otro fallo → fallback a yt-dlp (que sí tiene cookies vía cookiefile)
-        print(f"⚠️ instaloader no pudo ({err_inst}), fallback a yt-dlp con cookies...")
+        if archivos:
+            salud_instagram.record(estrategia, True, tardo)
+            return info, archivos, None
 
-    # Usar opciones específicas por plataforma
-    if plataforma == 'twitter':
-        opciones = YDL_OPTS_TWITTER
-    elif plataforma == 'instagram':
-        opciones = YDL_OPTS_INSTAGRAM
-    elif plataforma == 'tiktok':
-        opciones = YDL_OPTS_TIKTOK
-    else:
-        opciones = YDL_OPTS
+        # OJO: la API devuelve 404 también cuando el sessionid expiró, así que
+        # su "not_found" no es confiable → cuenta como fallo y se siguen probando.
+        # El de instaloader sí es confiable: respondió bien, el post no existe.
+        if estrategia == 'instaloader' and err == "not_found":
+            salud_instagram.record(estrategia, True, tardo)
+            return None, [], "Instagram: post no encontrado o eliminado"
+        if estrategia == 'yt-dlp':
+            error_ytdlp = err
+            if err and err.startswith("too_large"):
+                # El link anda, solo que no entra: ninguna otra estrategia lo arregla
+                salud_instagram.record(estrategia, True, tardo)
+                return None, [], err
+        if err not in _ERRORES_NEUTROS:
+            salud_instagram.record(estrategia, False, tardo)
+        errores.append(f"{estrategia}: {err}")
+        print(f"⚠️ Instagram {estrategia} no pudo ({err}), probando la siguiente estrategia...")
+
+    # El error de yt-dlp es el más descriptivo para el usuario
+    return None, [], error_ytdlp or "Instagram: " + "; ".join(errores)
+
+
+def _descargar_con_ytdlp(url, plataforma, carpeta, max_reintentos, limite_mb, reencodar, progreso=None,
+                        solo_audio=False):
+    """Descarga con yt-dlp dentro de `carpeta`, eligiendo formato por tamaño.
+    Con `solo_audio` usa el perfil de audio de la plataforma (ver _perfil_audio)."""
+    # Import diferido: yt-dlp es pesado de cargar y solo hace falta al descargar
+    import yt_dlp
+
+    # Opciones específicas por plataforma. Las cookies las pone el pool y
+    # cambian solas si cambia la fuente (Twitter las necesita sí o sí: los
+    # guest tokens ya no funcionan)
+    pools = YDL_POOLS_AUDIO if solo_audio else YDL_POOLS
+    pool = pools.get(plataforma, pools['default'])
+    # Lo que este trabajo cambia respecto del perfil (format, extractor_args...)
+    cambios = {}
+
+    # FASE 1: extraer una sola vez (o tomarlo de probe_cache). Con otras cookies
+    # la extracción puede dar otro resultado, por eso su versión va en la clave.
+    # El modo no: el sondeo no elige formato, sirve igual para video y audio.
+    fuente = _fuente_cookies(plataforma)
+    fuente.refresh()
+    clave_sondeo = f"{plataforma}|{fuente.version}|{canonical.clave(url)}"
+    info_sondeo, sondeo_cacheado = _sondear(url, pool, clave_sondeo)
+
+    # Elegir de antemano un formato que entre en el límite de subida, en vez de
+    # enterarse de que no entra después de bajarlo y mergearlo entero. El audio
+    # también: un podcast o un mix de horas pasa los 50 MB
+    if limite_mb and info_sondeo is not None:
+        formato, estimado, entra = _formato_que_entra(info_sondeo, pool, limite_mb * 1024 * 1024,
+                                                      solo_audio)
+        if not entra:
+            mb = estimado / (1024 * 1024)
+            print(f"🚫 Ningún formato entra en {limite_mb} MB (el más liviano pesa ~{mb:.0f} MB)")
+            # El audio no se re-encodea: se extrae tal cual viene
+            if solo_audio or not reencodar or mb > MONKEY_REENCODE_MAX_SOURCE_MB:
+                return None, [], f"too_large: el contenido pesa ~{mb:.0f} MB (límite {limite_mb} MB)"
+            print(f"🎞️ Se baja el formato más liviano ({formato}) para re-encodearlo")
+            cambios['format'] = formato
+        elif formato != pool.opciones.get('format'):
+            est = f"~{estimado / (1024 * 1024):.1f} MB" if estimado else "peso desconocido"
+            print(f"📏 Formato elegido por tamaño: {formato} ({est})")
+            cambios['format'] = formato
 
     ultimo_error = None
 
     for intento in range(max_reintentos + 1):
-        archivos_antes = set(glob.glob('downloads/*'))
+        # Lo que quede de un intento fallido (.part, fragmentos) no es de este intento
+        for nombre in os.listdir(carpeta):
+            ruta = os.path.join(carpeta, nombre)
+            if os.path.isdir(ruta):
+                _borrar_directorio(ruta)
+            else:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+        # El hook de MoveFiles recibe la ruta FINAL de cada archivo (ya mergeado)
+        terminados = []
+
+        def _hook_postprocesado(d):
+            if d.get('status') == 'finished' and d.get('postprocessor') == 'MoveFiles':
+                ruta = (d.get('info_dict') or {}).get('filepath')
+                if ruta:
+                    terminados.append(ruta)
+
+        # El audio se manda como archivo: que el nombre diga qué canción es
+        plantilla = '%(title).60B [%(id)s].%(ext)s' if solo_audio else '%(id)s_%(autonumber)s.%(ext)s'
+        cambios_job = {
+            **cambios,
+            'outtmpl': os.path.join(carpeta, plantilla),
+            'postprocessor_hooks': [_hook_postprocesado],
+        }
+        if progreso:
+            cambios_job['progress_hooks'] = [_hook_progreso(progreso)]
 
         try:
-            with yt_dlp.YoutubeDL(opciones) as ydl:
-                info = ydl.extract_info(url, download=True)
-
-            archivos_despues = set(glob.glob('downloads/*'))
-            archivos_nuevos = sorted(archivos_despues - archivos_antes)
-
-            # Si yt-dlp descargó algo pero no lo detectó el glob, buscar en info
-            if not archivos_nuevos and info:
-                archivo = info.get('filepath') or info.get('_filename') or info.get('filename')
-                if not archivo and 'requested_downloads' in info:
-                    descargas = info.get('requested_downloads', [])
-                    if descargas:
-                        archivo = descargas[0].get('filepath') or descargas[0].get('_filename')
-                if archivo and os.path.exists(archivo):
-                    archivos_nuevos.append(archivo)
-                    print(f"✅ Encontrado vía info dict: {archivo}")
+            # FASE 2: con el sondeo solo se vuelve a elegir formato y se descarga.
+            # Los fragmentos HLS/DASH van en paralelo según lo que deje el presupuesto.
+            with fragment_budget.fragmentos(plataforma) as concurrentes, \
+                    pool.prestado(**cambios_job, concurrent_fragment_downloads=concurrentes) as ydl:
+                if info_sondeo is not None:
+                    info = ydl.process_ie_result(copy.deepcopy(info_sondeo), download=True)
+                else:
+                    info = ydl.extract_info(url, download=True)
+
+            archivos_nuevos = []
+            for ruta in terminados + _archivos_de_info(info):
+                if ruta not in archivos_nuevos and os.path.exists(ruta):
+                    archivos_nuevos.append(ruta)
+
+            # Último recurso: la carpeta es solo de este trabajo, listarla es barato
+            if not archivos_nuevos:
+                archivos_nuevos = sorted(
+                    os.path.join(carpeta, n) for n in os.listdir(carpeta)
+                    if not n.endswith(('.part', '.ytdl', '.temp'))
+                    and os.path.isfile(os.path.join(carpeta, n))
+                )
+                if archivos_nuevos:
+                    print(f"✅ Encontrados en la carpeta del trabajo: {archivos_nuevos}")
 
             return info, archivos_nuevos, None
 
@@ -527,18 +988,27 @@ def descargar_media(url, max_reintentos=2):
             ultimo_error = e
             error_str = str(e).lower()
 
+            # Un sondeo cacheado puede traer URLs de formatos ya vencidas:
+            # se descarta y el reintento extrae de nuevo
+            if (sondeo_cacheado and intento < max_reintentos
+                    and 'requested format is not available' not in error_str):
+                print("⚠️ Falló la descarga con el sondeo cacheado, extrayendo de nuevo...")
+                probe_cache.invalidate(clave_sondeo)
+                info_sondeo, sondeo_cacheado = None, False
+                continue
+
             # Si es error de formato (YouTube Shorts), intentar con formatos cada vez más simples
             if 'requested format is not available' in error_str:
                 if intento == 0:
-                    print(f"⚠️ Formato no disponible, reintentando con best[ext=mp4]/best...")
-                    opciones = {**opciones, 'format': 'best[ext=mp4]/best'}
+                    simple = 'bestaudio/best' if solo_audio else 'best[ext=mp4]/best'
+                    print(f"⚠️ Formato no disponible, reintentando con {simple}...")
+                    cambios['format'] = simple
                     continue
                 else:
                     # Último recurso: formato 'best' sin merge_output_format
                     print(f"⚠️ Sigue fallando, reintentando con formato 'best' puro...")
-                    opciones_simple = {**opciones, 'format': 'best'}
-                    opciones_simple.pop('merge_output_format', None)
-                    opciones = opciones_simple
+                    cambios['format'] = 'best'
+                    cambios['merge_output_format'] = None
                     continue
 
             # Instagram: si yt-dlp falló por restricción y NO hay login instaloader,
@@ -548,10 +1018,9 @@ def descargar_media(url, max_reintentos=2):
                 and not IL.context.is_logged_in
                 and intento < max_reintentos):
                 print("⚠️ Reintentando yt-dlp con force_generic=True (sin login instaloader)...")
-                opciones = {
-                    **opciones,
-                    'extractor_args': {'instagram': {'force_generic': True}},
-                }
+                cambios['extractor_args'] = {'instagram': {'force_generic': True}}
+                # Otro extractor: el sondeo ya no sirve
+                info_sondeo = None
                 continue
 
             # No reintentar para otros errores de descarga
@@ -578,5 +1047,109 @@ def descargar_media(url, max_reintentos=2):
     return None, [], str(ultimo_error) if ultimo_error else "Error desconocido"
 
 
+def _sondear(url, pool, clave):
+    """Info de `url` sin descargar, de probe_cache o con extract_info(download=False).
+    Retorna (info, cacheado); (None, False) si no se pudo sondear, y entonces la
+    descarga extrae por su cuenta (y se encarga del error, si lo hay)."""
+    info = probe_cache.get(clave)
+    if info is not None:
+        print(f"⚡ Sondeo cacheado: {clave}")
+        return info, True
+    try:
+        # Formato permisivo: elegir el definitivo es cosa de la descarga, y un
+        # 'requested format is not available' acá no tiene que tirar el sondeo
+        with pool.prestado(format='bestvideo*+bestaudio/best') as ydl:
+            info = ydl.extract_info(url, download=False)
+            # Playlists/carruseles no se pueden reprocesar desde el info saneado
+            # (pierde las entries): esos se extraen en la descarga, como antes
+            if not info or info.get('entries') is not None:
+                return None, False
+            # Igual que --load-info-json: sin la selección de formato de este sondeo
+            info = ydl.sanitize_info(info, remove_private_keys=True)
+    except Exception as e:
+        print(f"⚠️ No se pudo sondear ({type(e).__name__}: {str(e)[:100]})")
+        return None, False
+    probe_cache.put(clave, info)
+    return copy.deepcopy(info), False
+
+
+def _hook_progreso(progreso):
+    """progress_hook de yt-dlp que reporta a `progreso(descargados, total, velocidad, eta)`."""
+    def _hook(d):
+        if d.get('status') != 'downloading':
+            return
+        progreso(d.get('downloaded_bytes') or 0,
+                 d.get('total_bytes') or d.get('total_bytes_estimate'),
+                 d.get('speed'), d.get('eta'))
+    return _hook
+
+
+# =============================================
+# SELECCIÓN DE FORMATO POR TAMAÑO
+# =============================================
+# Alturas a probar, de mejor a peor, cuando el formato preferido no entra
+_ALTURAS_FALLBACK = (1080, 720, 480, 360, 240)
+
+
+def _estimar_bytes(formato, duracion):
+    """Peso estimado de un formato: filesize, filesize_approx o tbr × duración."""
+    size = formato.get('filesize') or formato.get('filesize_approx')
+    if size:
+        return size
+    tbr = formato.get('tbr')
+    if tbr and duracion:
+        return tbr * 1000 / 8 * duracion
+    return None
+
+
+def _formato_que_entra(info, pool, limite_bytes, solo_audio=False):
+    """Con los formatos del sondeo (`info`, ver _sondear) retorna (format_id,
+    bytes_estimados, entra) del mejor que entra en `limite_bytes`, probando
+    resoluciones cada vez menores (con `solo_audio`, el audio más liviano).
+
+    - (formato_original, None, True) si no se puede decidir o el peso es
+      desconocido: se deja que la descarga siga como siempre.
+    - (format_id_del_mas_liviano, bytes_del_mas_liviano, False) si ninguno entra."""
+    formato_base = pool.opciones.get('format')
+    try:
+        # Solo se usa para armar selectores: el formato de la instancia da igual
+        with pool.prestado() as ydl:
+            if not info.get('formats'):
+                return formato_base, None, True
+            duracion = info.get('duration')
+            if solo_audio:
+                candidatos = [formato_base, 'worstaudio/worst']
+            else:
+                candidatos = [formato_base] + [
+                    f'bestvideo[height<={h}]+bestaudio/best[height<={h}]' for h in _ALTURAS_FALLBACK
+                ] + ['worst']
+            mas_liviano, spec_liviano = None, None
+            for spec in candidatos:
+                try:
+                    selector = ydl.build_format_selector(spec)
+                    elegidos = list(ydl._select_formats(info['formats'], selector))
+                except Exception:
+                    continue
+                if not elegidos:
+                    continue
+                elegido = elegidos[0]
+                partes = elegido.get('requested_formats') or [elegido]
+                estimaciones = [_estimar_bytes(f, duracion) for f in partes]
+                if any(e is None for e in estimaciones):
+                    # Sin datos de peso no hay cómo decidir: se intenta igual
+                    return elegido.get('format_id') or formato_base, None, True
+                total = sum(estimaciones)
+                if total <= limite_bytes:
+                    return elegido.get('format_id') or spec, total, True
+                if mas_liviano is None or total < mas_liviano:
+                    mas_liviano, spec_liviano = total, elegido.get('format_id') or spec
+            if mas_liviano is None:
+                return formato_base, None, True
+            return spec_liviano, mas_liviano, False
+    except Exception as e:
+        print(f"⚠️ No se pudo elegir formato por tamaño ({type(e).__name__}: {str(e)[:100]})")
+        return formato_base, None, True
+
+
 # URL de un reel público conocida para testear credenciales sin riesgo
 IG_TEST_URL = "https://www.instagram.com/reel/C8aRs6CJvSD/"
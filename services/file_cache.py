@@ -0,0 +1,129 @@
+"""
+file_cache.py - Caché de file_id de Telegram para el bot MonkeyDescargar.
+
+Cuando alguien vuelve a mandar un link ya descargado, los file_id que devolvió
+Telegram la primera vez alcanzan para reenviar el mismo contenido en milisegundos,
+sin descargar ni subir un solo byte. Se guarda en Supabase (el filesystem de Render
+es efímero) con un espejo en memoria para no consultar la BD en cada mensaje.
+
+Tabla: monkey_file_cache (ver monkey_file_cache_table.sql).
+Cada fila: url_key (PK, clave de la media: ver services/canonical.py), items (lista de {type, file_id}), created_at.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+
+from config import (
+    supabase,
+    MONKEY_FILE_CACHE,
+    MONKEY_FILE_CACHE_TTL_HOURS,
+    MONKEY_FILE_CACHE_MAX,
+)
+
+TABLE = "monkey_file_cache"
+
+# Espejo en memoria: url_key -> {"items": [...], "created_at": datetime}
+# OrderedDict para desalojar el menos usado cuando se supera MONKEY_FILE_CACHE_MAX.
+_memoria: "OrderedDict[str, dict]" = OrderedDict()
+_lock = threading.Lock()
+
+STATS = {
+    "enabled": MONKEY_FILE_CACHE,
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+    "expired": 0,
+}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _expirado(created_at: datetime) -> bool:
+    return _now() - created_at > timedelta(hours=MONKEY_FILE_CACHE_TTL_HOURS)
+
+
+def _recordar(url_key: str, items: list, created_at: datetime) -> None:
+    """Guarda en memoria desalojando las entradas más viejas si hace falta."""
+    with _lock:
+        _memoria[url_key] = {"items": items, "created_at": created_at}
+        _memoria.move_to_end(url_key)
+        while len(_memoria) > MONKEY_FILE_CACHE_MAX:
+            _memoria.popitem(last=False)
+            STATS["evictions"] += 1
+
+
+def _olvidar(url_key: str) -> None:
+    with _lock:
+        _memoria.pop(url_key, None)
+    try:
+        supabase.table(TABLE).delete().eq("url_key", url_key).execute()
+    except Exception as e:
+        print(f"⚠️ file_cache: error borrando {url_key!r}: {e}")
+
+
+def get_file_ids(url_key: str):
+    """Devuelve la lista de {type, file_id} cacheada para la URL o None."""
+    if not MONKEY_FILE_CACHE or not url_key:
+        return None
+
+    with _lock:
+        entry = _memoria.get(url_key)
+        if entry:
+            _memoria.move_to_end(url_key)
+
+    if entry is None:
+        try:
+            res = supabase.table(TABLE).select("*").eq("url_key", url_key).limit(1).execute()
+        except Exception as e:
+            print(f"⚠️ file_cache: error consultando {url_key!r} (tabla '{TABLE}'): {e}")
+            res = None
+        if res and res.data:
+            row = res.data[0]
+            try:
+                created_at = datetime.fromisoformat(str(row.get("created_at")).replace("Z", "+00:00"))
+            except Exception:
+                created_at = _now()
+            entry = {"items": row.get("items") or [], "created_at": created_at}
+            _recordar(url_key, entry["items"], created_at)
+
+    if entry and _expirado(entry["created_at"]):
+        STATS["expired"] += 1
+        _olvidar(url_key)
+        entry = None
+
+    if not entry or not entry["items"]:
+        STATS["misses"] += 1
+        return None
+    STATS["hits"] += 1
+    return entry["items"]
+
+
+def store_file_ids(url_key: str, items: list) -> None:
+    """Registra los file_id de un envío completo (idempotente por url_key)."""
+    if not MONKEY_FILE_CACHE or not url_key or not items:
+        return
+    created_at = _now()
+    _recordar(url_key, items, created_at)
+    STATS["stores"] += 1
+    try:
+        supabase.table(TABLE).upsert({
+            "url_key": url_key,
+            "items": items,
+            "created_at": created_at.isoformat(),
+        }).execute()
+    except Exception as e:
+        print(f"⚠️ file_cache: error guardando {url_key!r} (tabla '{TABLE}'): {e}")
+
+
+def invalidate(url_key: str) -> None:
+    """Descarta una entrada (p.ej. Telegram rechazó un file_id viejo)."""
+    _olvidar(url_key)
+
+
+def stats() -> dict:
+    with _lock:
+        size = len(_memoria)
+    return {**STATS, "entries_in_memory": size, "ttl_hours": MONKEY_FILE_CACHE_TTL_HOURS}
@@ -0,0 +1,82 @@
+"""
+fragment_budget.py - Fragmentos HLS/DASH en paralelo, con un tope global de conexiones.
+
+Los videos de YouTube y Twitter llegan en fragmentos DASH/HLS que yt-dlp baja de
+a uno; con la latencia de Render eso es casi todo el tiempo de descarga. yt-dlp
+puede bajar varios a la vez (`concurrent_fragment_downloads`), pero con varias
+descargas en paralelo las conexiones se multiplican.
+
+Cada plataforma pide cuántos fragmentos quiere en paralelo (MONKEY_FRAGMENTS,
+p.ej. "youtube=4,twitter=4"). Las conexiones extra (todo lo que pase de una)
+salen de un presupuesto global de MONKEY_FRAGMENT_SLOTS compartido por todas
+las descargas: si no alcanza, el trabajo recibe las que queden, y si no queda
+ninguna baja de a un fragmento, como antes. Nunca espera por el presupuesto.
+"""
+import threading
+from contextlib import contextmanager
+
+from config import MONKEY_FRAGMENTS, MONKEY_FRAGMENT_SLOTS
+
+_lock = threading.Lock()
+_en_uso = 0
+
+STATS = {
+    "grants": 0,
+    "full": 0,
+    "reduced": 0,
+    "sequential": 0,
+    "peak_in_use": 0,
+}
+
+
+def deseados(plataforma):
+    """Fragmentos en paralelo configurados para `plataforma` (1 = de a uno)."""
+    return max(1, MONKEY_FRAGMENTS.get(plataforma, MONKEY_FRAGMENTS.get('default', 1)))
+
+
+def reservar(plataforma):
+    """Reserva conexiones para una descarga de `plataforma`. Retorna el valor
+    para concurrent_fragment_downloads (devolverlo con liberar())."""
+    global _en_uso
+    pedidos = deseados(plataforma)
+    if pedidos == 1:
+        return 1
+    with _lock:
+        extra = min(pedidos - 1, max(0, MONKEY_FRAGMENT_SLOTS - _en_uso))
+        _en_uso += extra
+        STATS["grants"] += 1
+        STATS["peak_in_use"] = max(STATS["peak_in_use"], _en_uso)
+        if extra == pedidos - 1:
+            STATS["full"] += 1
+        elif extra:
+            STATS["reduced"] += 1
+        else:
+            STATS["sequential"] += 1
+    return 1 + extra
+
+
+def liberar(concurrentes):
+    global _en_uso
+    with _lock:
+        _en_uso -= concurrentes - 1
+
+
+@contextmanager
+def fragmentos(plataforma):
+    """`with fragmentos(plataforma) as n:` reserva y libera al salir."""
+    n = reservar(plataforma)
+    try:
+        yield n
+    finally:
+        liberar(n)
+
+
+def stats():
+    with _lock:
+        en_uso = _en_uso
+    return {
+        **STATS,
+        "in_use": en_uso,
+        "slots": MONKEY_FRAGMENT_SLOTS,
+        "per_platform": dict(MONKEY_FRAGMENTS),
+    }
@@ -0,0 +1,52 @@
+"""
+ig_session_store.py - Persistencia de la sesión de instaloader.
+
+Loguearse en Instagram en cada arranque es lento (varias idas y vueltas de red
+antes de que el bot esté listo) y los logins repetidos disparan checkpoints de
+Instagram. La sesión (cookies) se guarda en Supabase, porque el filesystem de
+Render se borra en cada deploy, y se restaura sin tocar la red.
+
+Tabla: instagram_sessions (ver instagram_sessions_table.sql).
+"""
+from datetime import datetime, timezone
+
+from config import supabase
+
+TABLE = "instagram_sessions"
+
+
+def load_session(username: str):
+    """Devuelve el dict de cookies guardado para `username` o None."""
+    if not username:
+        return None
+    try:
+        res = supabase.table(TABLE).select("session").eq("username", username).limit(1).execute()
+    except Exception as e:
+        print(f"⚠️ ig_session_store.load_session error (tabla '{TABLE}'): {e}")
+        return None
+    if not res.data:
+        return None
+    return res.data[0].get("session") or None
+
+
+def save_session(username: str, session: dict) -> None:
+    """Guarda (o reemplaza) la sesión de `username`."""
+    if not username or not session:
+        return
+    try:
+        supabase.table(TABLE).upsert({
+            "username": username,
+            "session": session,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }).execute()
+        print(f"💾 Sesión de Instagram guardada para {username}")
+    except Exception as e:
+        print(f"⚠️ ig_session_store.save_session error (tabla '{TABLE}'): {e}")
+
+
+def delete_session(username: str) -> None:
+    """Borra una sesión que Instagram ya no acepta."""
+    try:
+        supabase.table(TABLE).delete().eq("username", username).execute()
+    except Exception as e:
+        print(f"⚠️ ig_session_store.delete_session error: {e}")
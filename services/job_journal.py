@@ -0,0 +1,176 @@
+"""
+job_journal.py - Bitácora durable de los trabajos del bot MonkeyDescargar.
+
+Un redeploy de Render mata el proceso con descargas a medias: se perdían los
+links pendientes de aceptación y el usuario quedaba mirando un "dame un monkey
+momento" para siempre. Cada trabajo se anota en Supabase con su estado
+(pending_accept → queued → downloading → uploading) y se borra al terminar.
+
+Al apagarse, la instancia marca sus trabajos como interrumpidos; la siguiente
+los reclama y los retoma (o los da por fallidos y edita el mensaje de espera).
+Un trabajo de otra instancia que no avanza en MONKEY_JOB_STALE_MINUTES también
+se reclama, por si el proceso murió sin llegar a marcarlos.
+
+Las escrituras (registrar, actualizar, terminar) no esperan a Supabase: el
+job_id se arma acá y la fila se escribe desde un hilo propio, así el handler de
+telebot no se traba si Supabase anda lento o caído. Es un solo hilo, y las
+escrituras de un trabajo llegan en el orden en que se pidieron.
+
+Tabla: monkey_jobs (ver monkey_jobs_table.sql).
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+from config import supabase, MONKEY_JOB_JOURNAL, MONKEY_JOB_STALE_MINUTES
+
+TABLE = "monkey_jobs"
+
+# Identifica a este proceso: durante un deploy conviven el viejo y el nuevo
+INSTANCE_ID = uuid.uuid4().hex[:12]
+
+_escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-journal")
+
+STATS = {
+    "enabled": MONKEY_JOB_JOURNAL,
+    "registered": 0,
+    "finished": 0,
+    "claimed": 0,
+    "errors": 0,
+}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _fecha(valor) -> datetime:
+    try:
+        return datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    except Exception:
+        return _now()
+
+
+def registrar(chat_id: int, user_id: int, url: str, estado: str, message_id=None, modo: str = "video"):
+    """Anota un trabajo nuevo. Retorna su job_id (o None si la bitácora está apagada).
+    `modo` es "video" o "audio" (comando /audio)."""
+    if not MONKEY_JOB_JOURNAL:
+        return None
+    job_id = uuid.uuid4().hex
+    ahora = _now().isoformat()
+    fila = {
+        "job_id": job_id,
+        "instance_id": INSTANCE_ID,
+        "chat_id": chat_id,
+        "user_id": user_id,
+        "url": url,
+        "state": estado,
+        "message_id": message_id,
+        "created_at": ahora,
+        "updated_at": ahora,
+    }
+    if modo != "video":
+        # Solo si hace falta: una tabla sin la columna mode sigue sirviendo para video
+        fila["mode"] = modo
+    _escritor.submit(_insertar, fila)
+    return job_id
+
+
+def actualizar(job_id, estado: str, message_id=None) -> None:
+    """Cambia el estado de un trabajo (y el mensaje de espera, si se pasa)."""
+    if not MONKEY_JOB_JOURNAL or not job_id:
+        return
+    cambios = {"state": estado, "updated_at": _now().isoformat()}
+    if message_id is not None:
+        cambios["message_id"] = message_id
+    _escritor.submit(_actualizar, job_id, estado, cambios)
+
+
+def terminar(job_id) -> None:
+    """Saca un trabajo de la bitácora (terminó bien, falló o se descartó)."""
+    if not MONKEY_JOB_JOURNAL or not job_id:
+        return
+    _escritor.submit(_borrar, job_id)
+
+
+def marcar_interrumpidos(timeout: float = 10) -> None:
+    """Al apagarse: deja los trabajos de esta instancia listos para que la
+    siguiente los reclame sin esperar a que se vuelvan huérfanos. Pasa por la
+    misma fila de escrituras, así las pendientes se aplican antes."""
+    if not MONKEY_JOB_JOURNAL:
+        return
+    try:
+        _escritor.submit(_marcar_interrumpidos).result(timeout=timeout)
+    except Exception as e:
+        print(f"⚠️ job_journal: error marcando trabajos interrumpidos: {e}")
+
+
+# ---- Escrituras (en el hilo de _escritor) ----
+def _insertar(fila: dict) -> None:
+    try:
+        supabase.table(TABLE).insert(fila).execute()
+        STATS["registered"] += 1
+    except Exception as e:
+        STATS["errors"] += 1
+        print(f"⚠️ job_journal: error registrando trabajo (tabla '{TABLE}'): {e}")
+
+
+def _actualizar(job_id, estado: str, cambios: dict) -> None:
+    try:
+        supabase.table(TABLE).update(cambios).eq("job_id", job_id).execute()
+    except Exception as e:
+        STATS["errors"] += 1
+        print(f"⚠️ job_journal: error actualizando {job_id} a {estado}: {e}")
+
+
+def _borrar(job_id) -> None:
+    try:
+        supabase.table(TABLE).delete().eq("job_id", job_id).execute()
+        STATS["finished"] += 1
+    except Exception as e:
+        STATS["errors"] += 1
+        print(f"⚠️ job_journal: error borrando {job_id}: {e}")
+
+
+def _marcar_interrumpidos() -> None:
+    supabase.table(TABLE).update({"interrupted": True}).eq("instance_id", INSTANCE_ID).execute()
+
+
+def reclamar_huerfanos() -> list:
+    """Reclama para esta instancia los trabajos interrumpidos o abandonados de
+    otras. Cada fila reclamada vuelve con `attempts` ya incrementado."""
+    if not MONKEY_JOB_JOURNAL:
+        return []
+    try:
+        res = supabase.table(TABLE).select("*").neq("instance_id", INSTANCE_ID).execute()
+    except Exception as e:
+        STATS["errors"] += 1
+        print(f"⚠️ job_journal: error buscando trabajos huérfanos (tabla '{TABLE}'): {e}")
+        return []
+
+    limite = _now() - timedelta(minutes=MONKEY_JOB_STALE_MINUTES)
+    reclamados = []
+    for fila in res.data or []:
+        if not fila.get("interrupted") and _fecha(fila.get("updated_at")) > limite:
+            continue  # La otra instancia sigue viva y trabajando
+        intentos = (fila.get("attempts") or 0) + 1
+        try:
+            # Condicionado a la instancia anterior: si otra lo reclamó primero, no hay filas
+            res_claim = supabase.table(TABLE).update({
+                "instance_id": INSTANCE_ID,
+                "interrupted": False,
+                "attempts": intentos,
+                "updated_at": _now().isoformat(),
+            }).eq("job_id", fila["job_id"]).eq("instance_id", fila["instance_id"]).execute()
+        except Exception as e:
+            STATS["errors"] += 1
+            print(f"⚠️ job_journal: error reclamando {fila['job_id']}: {e}")
+            continue
+        if res_claim.data:
+            reclamados.append({**fila, "attempts": intentos})
+    STATS["claimed"] += len(reclamados)
+    return reclamados
+
+
+def stats() -> dict:
+    return {**STATS, "instance_id": INSTANCE_ID, "stale_minutes": MONKEY_JOB_STALE_MINUTES}
@@ -0,0 +1,35 @@
+"""
+metrics.py - Registro por nombre de las instancias que exponen métricas.
+
+Las colas, grupos de single-flight, prefetchers, reporters de progreso, pools
+de yt-dlp, etc. se crean con un nombre y se anotan en el Registro de su módulo
+al construirse. /debug/status llama al stats() del módulo, que es el del
+Registro: un dict {nombre: instancia.stats()}.
+"""
+import threading
+
+
+class Registro:
+    """Instancias por nombre. Una instancia nueva con un nombre ya usado
+    reemplaza a la anterior."""
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def agregar(self, name, instancia):
+        with self._lock:
+            self._items[name] = instancia
+
+    def values(self):
+        with self._lock:
+            return list(self._items.values())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def stats(self):
+        with self._lock:
+            items = list(self._items.items())
+        return {name: instancia.stats() for name, instancia in items}
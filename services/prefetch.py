@@ -0,0 +1,178 @@
+"""
+prefetch.py - Descarga especulativa mientras el usuario está en la puerta de aceptación.
+
+Cuando un usuario nuevo manda un link, el Monkey le pide aceptar antes de bajar
+nada, y el tiempo que tarda en apretar el botón se sumaba entero a la espera.
+Con el prefetch la descarga arranca en segundo plano apenas se muestra la puerta;
+al aceptar, el trabajo real toma ese resultado (o espera a que termine).
+
+Si el usuario nunca acepta, el resultado se descarta al vencer el TTL. Hay un tope
+de disco para lo especulativo: lo que no entra se descarta apenas termina de bajar.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services import disk_janitor, metrics
+
+PREFETCHERS = metrics.Registro()
+
+
+def _peso(resultado):
+    """Bytes en disco de un resultado (info, archivos, error) de descargar_media."""
+    total = 0
+    for arch in (resultado or (None, [], None))[1] or []:
+        try:
+            total += os.path.getsize(arch)
+        except OSError:
+            pass
+    return total
+
+
+class SpeculativePrefetch:
+    """Un prefetch por dueño (user_id). `fn` debe retornar un Lease de
+    SingleFlight: así, si el usuario acepta mientras todavía se descarga, el
+    trabajo real se suma a esa misma descarga en vez de empezar otra."""
+
+    def __init__(self, name, workers, ttl_seconds, max_bytes):
+        self.name = name
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"{name}-prefetch")
+        self._lock = threading.Lock()
+        self._entries = {}      # owner -> {"key", "future", "ts", "bytes"}
+        self._bytes = 0
+        self._sweeper = None
+        self._stats = {"started": 0, "taken": 0, "cancelled": 0, "expired": 0, "over_quota": 0,
+                       "failed": 0, "evicted": 0}
+        PREFETCHERS.agregar(name, self)
+
+    # ---- API pública ----
+    def start(self, owner, key, fn):
+        """Arranca (o reemplaza) el prefetch de `owner` para `key`."""
+        with self._lock:
+            anterior = self._entries.pop(owner, None)
+            entry = {"key": key, "ts": time.time(), "bytes": 0}
+            entry["future"] = self._pool.submit(self._run, entry, fn)
+            self._entries[owner] = entry
+            self._stats["started"] += 1
+            self._start_sweeper()
+        if anterior:
+            self._discard(anterior)
+
+    def take(self, owner, key):
+        """Entrega el Lease prefetcheado de `owner` si era para `key`, esperando
+        a que termine si ya está bajando. None si no hay, se descartó o todavía
+        no había arrancado: ahí el trabajo descarga por su cuenta en vez de
+        esperar detrás de los prefetches de otros usuarios."""
+        with self._lock:
+            entry = self._entries.get(owner)
+            if not entry or entry["key"] != key:
+                return None
+            del self._entries[owner]
+        if entry["future"].cancel():
+            with self._lock:
+                self._stats["cancelled"] += 1
+            return None
+        try:
+            lease = entry["future"].result()
+        except Exception:
+            return None
+        disk_janitor.no_desalojable(id(entry))
+        with self._lock:
+            self._bytes -= entry["bytes"]
+            if lease is not None:
+                self._stats["taken"] += 1
+        return lease
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "pending": len(self._entries),
+                "disk_mb": round(self._bytes / (1024 * 1024), 1),
+                "max_disk_mb": round(self.max_bytes / (1024 * 1024), 1),
+                "ttl_seconds": self.ttl,
+            }
+
+    # ---- Internos ----
+    def _run(self, entry, fn):
+        try:
+            lease = fn()
+        except Exception as e:
+            with self._lock:
+                self._stats["failed"] += 1
+            print(f"⚠️ {self.name}: prefetch de {entry['key']} falló: {e}")
+            return None
+        peso = _peso(lease.result)
+        with self._lock:
+            if self._bytes + peso > self.max_bytes:
+                self._stats["over_quota"] += 1
+                lease_sobra = lease
+            else:
+                self._bytes += peso
+                entry["bytes"] = peso
+                lease_sobra = None
+        if lease_sobra:
+            print(f"⚠️ {self.name}: prefetch de {entry['key']} descartado "
+                  f"({peso / (1024 * 1024):.1f} MB excede el tope especulativo)")
+            lease_sobra.release()
+            return None
+        # Mientras nadie lo acepte, si falta disco se puede desalojar. Solo si
+        # sigue en la tabla: si ya lo tomaron o lo descartaron (y _discard ya
+        # llamó a no_desalojable), anotarlo dejaría en el janitor una entrada
+        # sin dueño. Lo descartado lo suelta el callback de _discard.
+        with self._lock:
+            if any(e is entry for e in self._entries.values()):
+                disk_janitor.desalojable(id(entry), (lease.result or (None, [], None))[1] or [],
+                                         lambda: self._desalojar(entry))
+        return lease
+
+    def _desalojar(self, entry):
+        """Lo pide disk_janitor cuando falta lugar: se descarta si sigue sin tomar."""
+        with self._lock:
+            duenos = [o for o, e in self._entries.items() if e is entry]
+            for owner in duenos:
+                del self._entries[owner]
+            self._stats["evicted"] += len(duenos)
+        if duenos:
+            self._discard(entry)
+
+    def _discard(self, entry):
+        """Suelta el resultado de un prefetch que nadie va a usar (si todavía no
+        arrancó, ni siquiera se descarga)."""
+        disk_janitor.no_desalojable(id(entry))
+        entry["future"].cancel()
+        def _soltar(future):
+            try:
+                lease = future.result()
+            except Exception:
+                lease = None
+            with self._lock:
+                self._bytes -= entry["bytes"]
+                entry["bytes"] = 0
+            if lease is not None:
+                lease.release()
+        entry["future"].add_done_callback(_soltar)
+
+    def _start_sweeper(self):
+        if self._sweeper:
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, name=f"{self.name}-prefetch-ttl", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(max(5, min(60, self.ttl / 4)))
+            ahora = time.time()
+            with self._lock:
+                vencidos = [o for o, e in self._entries.items() if ahora - e["ts"] > self.ttl]
+                entries = [self._entries.pop(o) for o in vencidos]
+                self._stats["expired"] += len(entries)
+            for entry in entries:
+                print(f"🗑️ {self.name}: prefetch de {entry['key']} vencido sin aceptar")
+                self._discard(entry)
+
+
+stats = PREFETCHERS.stats
@@ -0,0 +1,86 @@
+"""
+probe_cache.py - Caché en memoria de los sondeos de yt-dlp (extract_info sin descargar).
+
+Cada link pagaba la extracción (páginas, APIs, negociación de formatos) hasta
+tres veces: en el sondeo de tamaño y en cada reintento de la descarga, que
+armaba un YoutubeDL nuevo y volvía a llamar a extract_info. Ahora la descarga
+va en dos fases: un sondeo `extract_info(download=False)` que se guarda acá
+por clave de media, y la descarga con `process_ie_result` sobre ese resultado,
+que solo vuelve a elegir el formato. Un reintento con un formato más simple
+no vuelve a extraer.
+
+Las URLs de los formatos vencen (las de YouTube en unas horas, las de TikTok
+antes), así que las entradas duran MONKEY_PROBE_CACHE_TTL_SECONDS. Si una
+descarga con un sondeo cacheado falla, se invalida y el reintento extrae de nuevo.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from config import MONKEY_PROBE_CACHE_TTL_SECONDS, MONKEY_PROBE_CACHE_MAX
+
+# clave -> (info saneado, creado_en)
+_memoria: "OrderedDict[str, tuple]" = OrderedDict()
+_lock = threading.Lock()
+
+STATS = {
+    "enabled": MONKEY_PROBE_CACHE_TTL_SECONDS > 0,
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "expired": 0,
+    "evictions": 0,
+    "invalidated": 0,
+}
+
+
+def get(clave):
+    """Copia del info guardado para `clave` (process_ie_result lo modifica), o None."""
+    if MONKEY_PROBE_CACHE_TTL_SECONDS <= 0:
+        return None
+    with _lock:
+        entrada = _memoria.get(clave)
+        if entrada is None:
+            STATS["misses"] += 1
+            return None
+        info, creado = entrada
+        if time.time() - creado > MONKEY_PROBE_CACHE_TTL_SECONDS:
+            del _memoria[clave]
+            STATS["expired"] += 1
+            STATS["misses"] += 1
+            return None
+        _memoria.move_to_end(clave)
+        STATS["hits"] += 1
+    return copy.deepcopy(info)
+
+
+def put(clave, info):
+    """Guarda un info ya saneado (YoutubeDL.sanitize_info) para `clave`."""
+    if MONKEY_PROBE_CACHE_TTL_SECONDS <= 0 or not info:
+        return
+    with _lock:
+        _memoria[clave] = (info, time.time())
+        _memoria.move_to_end(clave)
+        STATS["stores"] += 1
+        while len(_memoria) > MONKEY_PROBE_CACHE_MAX:
+            _memoria.popitem(last=False)
+            STATS["evictions"] += 1
+
+
+def invalidate(clave):
+    with _lock:
+        if _memoria.pop(clave, None) is not None:
+            STATS["invalidated"] += 1
+
+
+def stats():
+    with _lock:
+        tamano = len(_memoria)
+    total = STATS["hits"] + STATS["misses"]
+    return {
+        **STATS,
+        "size": tamano,
+        "hit_rate": round(STATS["hits"] / total, 3) if total else None,
+        "ttl_seconds": MONKEY_PROBE_CACHE_TTL_SECONDS,
+    }
@@ -0,0 +1,136 @@
+"""
+progress.py - Progreso de descargas en vivo, con tope de ediciones por chat.
+
+Durante una descarga larga el usuario veía un "Monkey Descargando..." fijo por
+minutos y muchas veces reenviaba el link, duplicando la carga. Las descargas
+publican su avance (bytes, total, velocidad, ETA) por clave de descarga; quien
+espera esa clave se suscribe con un callback que edita su mensaje.
+
+publish() solo guarda el último dato (los hooks de yt-dlp disparan decenas de
+veces por segundo), y solo de claves que alguien sigue: el de un prefetch que
+nadie aceptó no queda guardado. Un hilo aparte entrega a cada suscriptor el
+dato más nuevo, como mucho una vez cada `interval` segundos por chat: las
+actualizaciones intermedias se funden y nunca se llega al rate limit de
+ediciones de Telegram.
+"""
+import itertools
+import threading
+import time
+
+from services import metrics
+
+REPORTERS = metrics.Registro()
+
+# Cada cuánto se revisa si hay algo que entregar
+_TICK = 1.0
+
+
+class _Suscripcion:
+    __slots__ = ("key", "chat_id", "callback", "version", "lock", "activa")
+
+    def __init__(self, key, chat_id, callback):
+        self.key = key
+        self.chat_id = chat_id
+        self.callback = callback
+        self.version = 0
+        self.lock = threading.Lock()
+        self.activa = True
+
+
+class ProgressReporter:
+    """`subscribe(key, chat_id, callback)` → token; `callback(datos)` recibe un
+    dict con downloaded, total, speed, eta y percent (los que se conozcan)."""
+
+    def __init__(self, name, interval):
+        self.name = name
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._datos = {}            # key -> (version, datos)
+        self._subs = {}             # token -> _Suscripcion
+        self._seguidas = {}         # key -> cantidad de suscriptores
+        self._ultima_edicion = {}   # chat_id -> time
+        self._tokens = itertools.count(1)
+        self._hilo = None
+        self._stats = {"published": 0, "delivered": 0, "coalesced": 0}
+        REPORTERS.agregar(name, self)
+
+    # ---- API pública ----
+    def publish(self, key, downloaded, total=None, speed=None, eta=None):
+        if self.interval <= 0:
+            return
+        datos = {"downloaded": downloaded, "total": total, "speed": speed, "eta": eta,
+                 "percent": min(100.0, downloaded * 100 / total) if total else None}
+        with self._lock:
+            if key not in self._seguidas:
+                return
+            version = self._datos.get(key, (0, None))[0] + 1
+            self._datos[key] = (version, datos)
+            self._stats["published"] += 1
+
+    def subscribe(self, key, chat_id, callback):
+        if self.interval <= 0:
+            return None
+        token = next(self._tokens)
+        with self._lock:
+            self._subs[token] = _Suscripcion(key, chat_id, callback)
+            self._seguidas[key] = self._seguidas.get(key, 0) + 1
+            self._iniciar()
+        return token
+
+    def unsubscribe(self, token):
+        """Después de esto el callback ya no corre (si estaba corriendo, se espera)."""
+        with self._lock:
+            sub = self._subs.pop(token, None)
+            if sub:
+                self._seguidas[sub.key] -= 1
+                if not self._seguidas[sub.key]:
+                    del self._seguidas[sub.key]
+                    self._datos.pop(sub.key, None)
+        if sub:
+            with sub.lock:
+                sub.activa = False
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "subscribers": len(self._subs), "tracked_keys": len(self._datos),
+                    "interval_seconds": self.interval}
+
+    # ---- Internos ----
+    def _iniciar(self):
+        if self._hilo:
+            return
+        self._hilo = threading.Thread(target=self._loop, name=f"{self.name}-progress", daemon=True)
+        self._hilo.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(_TICK)
+            ahora = time.time()
+            entregas = []
+            with self._lock:
+                for sub in self._subs.values():
+                    version, datos = self._datos.get(sub.key, (0, None))
+                    if version <= sub.version:
+                        continue
+                    if ahora - self._ultima_edicion.get(sub.chat_id, 0) < self.interval:
+                        continue
+                    self._stats["coalesced"] += version - sub.version - 1
+                    sub.version = version
+                    self._ultima_edicion[sub.chat_id] = ahora
+                    entregas.append((sub, datos))
+                # Chats que ya no tienen suscriptores no necesitan recordar su última edición
+                activos = {s.chat_id for s in self._subs.values()}
+                for chat_id in [c for c in self._ultima_edicion if c not in activos]:
+                    del self._ultima_edicion[chat_id]
+            for sub, datos in entregas:
+                with sub.lock:
+                    if not sub.activa:
+                        continue
+                    try:
+                        sub.callback(datos)
+                        self._stats["delivered"] += 1
+                    except Exception as e:
+                        print(f"⚠️ {self.name}: error mostrando progreso: {e}")
+
+
+stats = REPORTERS.stats
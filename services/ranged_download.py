@@ -0,0 +1,177 @@
+"""
+ranged_download.py - Descargas HTTP directas que se retoman con Range.
+
+Los reels grandes de la CDN de Instagram se cortaban a mitad de camino en Render
+y el reintento volvía a bajar todo desde el byte 0. Acá cada reintento pide solo
+lo que falta (`Range: bytes=N-`), con `If-Range` para que, si el archivo cambió
+en el servidor, la respuesta sea el archivo completo en vez de un pedazo de otro.
+
+Opcionalmente, un archivo grande se parte en segmentos de bytes que se bajan en
+paralelo sobre el mismo archivo destino (cada uno se retoma por su cuenta).
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import MONKEY_HTTP_SEGMENTS, MONKEY_HTTP_SEGMENT_MIN_MB
+
+CHUNK_SIZE = 256 * 1024
+REINTENTOS = 4
+
+_segment_pool = ThreadPoolExecutor(max_workers=max(1, MONKEY_HTTP_SEGMENTS * 2),
+                                   thread_name_prefix='http-segment')
+_stats_lock = threading.Lock()
+
+STATS = {
+    "downloads": 0,
+    "failed": 0,
+    "resumes": 0,
+    "resumed_bytes": 0,
+    "restarted": 0,
+    "segmented": 0,
+}
+
+
+def _sumar(**valores):
+    with _stats_lock:
+        for k, v in valores.items():
+            STATS[k] += v
+
+
+def _total_de(resp):
+    """Tamaño total del recurso según Content-Range (206) o Content-Length (200)."""
+    rango = resp.headers.get('Content-Range', '')
+    m = re.match(r'bytes \d+-\d+/(\d+)', rango)
+    if m:
+        return int(m.group(1))
+    if resp.status_code == 200 and resp.headers.get('Content-Length', '').isdigit():
+        return int(resp.headers['Content-Length'])
+    return None
+
+
+class _Validador:
+    """ETag / Last-Modified de la primera respuesta, para mandar If-Range."""
+
+    def __init__(self):
+        self.valor = None
+
+    def tomar(self, resp):
+        if self.valor is None:
+            self.valor = resp.headers.get('ETag') or resp.headers.get('Last-Modified')
+
+
+def _bajar_rango(session, url, destino, inicio, fin, headers, timeout, validador, progreso):
+    """Baja [inicio, fin] (fin=None: hasta el final) escribiendo en `destino` a
+    partir de `inicio`, retomando desde donde quedó en cada reintento. Retorna
+    el total del recurso si se conoce."""
+    hecho = 0
+    total = None
+    ultimo_error = None
+    for intento in range(REINTENTOS + 1):
+        desde = inicio + hecho
+        if fin is not None and desde > fin:
+            return total
+        pedido = dict(headers)
+        if desde > 0 or fin is not None:
+            pedido['Range'] = f"bytes={desde}-{'' if fin is None else fin}"
+            if validador.valor:
+                pedido['If-Range'] = validador.valor
+        try:
+            with session.get(url, headers=pedido, stream=True, timeout=timeout) as resp:
+                if resp.status_code == 416 and fin is None and hecho:
+                    return total  # Ya estaba todo: el servidor no tiene más bytes
+                resp.raise_for_status()
+                validador.tomar(resp)
+                total = _total_de(resp) or total
+                if resp.status_code == 200 and fin is not None:
+                    # Un segmento no puede recibir el archivo entero
+                    raise IOError("el servidor ignoró Range en un segmento")
+                if desde > 0 and resp.status_code == 200:
+                    # Ignoró el Range (o el archivo cambió): se empieza de cero
+                    _sumar(restarted=1)
+                    hecho = 0
+                    desde = 0
+                elif hecho:
+                    _sumar(resumes=1, resumed_bytes=hecho)
+                    print(f"  ↪️ Retomando {os.path.basename(destino)} desde el byte {desde}")
+                with open(destino, 'r+b' if os.path.exists(destino) else 'wb') as f:
+                    f.seek(desde)
+                    if desde == 0 and fin is None:
+                        f.truncate()
+                    for chunk in resp.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        hecho += len(chunk)
+                        if progreso:
+                            progreso(len(chunk), total)
+            esperado = (fin - inicio + 1) if fin is not None else (total - inicio if total else None)
+            if esperado is None or hecho >= esperado:
+                return total
+            ultimo_error = IOError(f"conexión cortada: {hecho} de {esperado} bytes")
+        except Exception as e:
+            ultimo_error = e
+        if intento < REINTENTOS:
+            time.sleep(min(2 ** intento, 8) * 0.5)
+    raise ultimo_error
+
+
+def descargar(session, url, destino, headers=None, timeout=120, segmentos=None, progreso=None):
+    """Baja `url` a `destino` retomando con Range si la conexión se corta.
+    Si el servidor acepta rangos y el archivo pesa más de MONKEY_HTTP_SEGMENT_MIN_MB,
+    lo parte en `segmentos` rangos paralelos. `progreso(bytes_nuevos, total)` se
+    llama por cada bloque escrito. Lanza la última excepción si no se pudo."""
+    headers = headers or {}
+    segmentos = MONKEY_HTTP_SEGMENTS if segmentos is None else segmentos
+    validador = _Validador()
+    try:
+        if segmentos > 1:
+            total = _tamano_si_acepta_rangos(session, url, headers, timeout, validador)
+            if total and total >= MONKEY_HTTP_SEGMENT_MIN_MB * 1024 * 1024:
+                _descargar_en_segmentos(session, url, destino, headers, timeout,
+                                        validador, progreso, total, segmentos)
+                _sumar(downloads=1, segmented=1)
+                return destino
+        _bajar_rango(session, url, destino, 0, None, headers, timeout, validador, progreso)
+    except Exception:
+        _sumar(failed=1)
+        raise
+    _sumar(downloads=1)
+    return destino
+
+
+def _tamano_si_acepta_rangos(session, url, headers, timeout, validador):
+    """Tamaño total si el servidor responde a un Range de 1 byte con 206, o None."""
+    try:
+        with session.get(url, headers={**headers, 'Range': 'bytes=0-0'},
+                         stream=True, timeout=timeout) as resp:
+            if resp.status_code != 206:
+                return None
+            validador.tomar(resp)
+            return _total_de(resp)
+    except Exception:
+        return None
+
+
+def _descargar_en_segmentos(session, url, destino, headers, timeout, validador, progreso, total, segmentos):
+    # Se reserva el archivo entero: cada segmento escribe en su propio tramo
+    with open(destino, 'wb') as f:
+        f.truncate(total)
+    tramo = -(-total // segmentos)
+    rangos = [(i, min(i + tramo, total) - 1) for i in range(0, total, tramo)]
+    futuros = [
+        _segment_pool.submit(_bajar_rango, session, url, destino, ini, fin,
+                             headers, timeout, validador, progreso)
+        for ini, fin in rangos
+    ]
+    for futuro in futuros:
+        futuro.result()
+
+
+def stats():
+    with _stats_lock:
+        return {
+            **STATS,
+            "segments_per_download": MONKEY_HTTP_SEGMENTS,
+            "segment_min_mb": MONKEY_HTTP_SEGMENT_MIN_MB,
+        }
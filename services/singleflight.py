@@ -0,0 +1,118 @@
+"""
+singleflight.py - Deduplicación de descargas idénticas en vuelo.
+
+En los grupos varias personas pegan el mismo link viral en segundos, y cada una
+disparaba su propia descarga completa. Con SingleFlight el primero (el "líder")
+descarga y los demás esperan ese mismo resultado. Cada uno recibe un Lease y lo
+libera al terminar de enviar; los archivos se borran recién cuando se libera el
+último, así nadie se queda sin archivos a mitad de su envío.
+"""
+import threading
+
+from services import metrics
+
+FLIGHTS = metrics.Registro()
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "refs")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.refs = 1
+
+
+class Lease:
+    """Acceso compartido al resultado de una descarga. `shared` es True si otro
+    trabajo fue el que descargó."""
+
+    def __init__(self, group, key, flight, shared):
+        self._group = group
+        self._key = key
+        self._flight = flight
+        self._released = False
+        self.shared = shared
+
+    @property
+    def result(self):
+        return self._flight.result
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self._group._release(self._key, self._flight)
+
+
+class SingleFlight:
+    """`cleanup(result)` se llama cuando se libera el último Lease.
+    `reusable(result)` decide si un resultado se comparte con quien llegue
+    después de que terminó la descarga (p.ej. solo si trajo archivos)."""
+
+    def __init__(self, name, cleanup, reusable=lambda result: True):
+        self.name = name
+        self._cleanup = cleanup
+        self._reusable = reusable
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stats = {"leaders": 0, "joined": 0}
+        FLIGHTS.agregar(name, self)
+
+    def do(self, key, fn):
+        """Ejecuta `fn()` una sola vez por `key` entre los trabajos concurrentes.
+        Retorna un Lease; si `fn` lanza, la excepción se propaga a todos."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.refs += 1
+                self._stats["joined"] += 1
+                leader = False
+            else:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._stats["leaders"] += 1
+                leader = True
+
+        if leader:
+            try:
+                flight.result = fn()
+            except BaseException as e:
+                flight.error = e
+            finally:
+                if flight.error is not None or not self._reusable(flight.result):
+                    # Un fallo no se comparte con los que lleguen después: que reintenten
+                    with self._lock:
+                        if self._flights.get(key) is flight:
+                            del self._flights[key]
+                flight.done.set()
+        else:
+            print(f"🔁 {self.name}: esperando descarga en curso de {key}")
+            flight.done.wait()
+
+        lease = Lease(self, key, flight, shared=not leader)
+        if flight.error is not None:
+            lease.release()
+            raise flight.error
+        return lease
+
+    def _release(self, key, flight):
+        with self._lock:
+            flight.refs -= 1
+            if flight.refs > 0:
+                return
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if flight.error is None:
+            try:
+                self._cleanup(flight.result)
+            except Exception as e:
+                print(f"⚠️ {self.name}: error limpiando {key}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._flights)}
+
+
+stats = FLIGHTS.stats
@@ -0,0 +1,43 @@
+"""
+startup_metrics.py - Benchmark de arranque: cuánto tarda en importarse cada módulo.
+
+main.py importa los bots a través de importar_medido() y el resultado se expone en
+/debug/status. Los tiempos incluyen las dependencias que cada módulo importa por
+primera vez (yt-dlp, instaloader, Pillow...). Para el detalle fino, correr
+`python -X importtime main.py`.
+"""
+import importlib
+import threading
+import time
+
+PROCESS_START = time.time()
+
+_lock = threading.Lock()
+IMPORT_TIMES = {}   # módulo -> segundos
+EVENTS = {}         # hito ("port_bound", "port_wait_timeout", ...) -> segundos desde el arranque
+
+
+def importar_medido(nombre):
+    """Importa `nombre` registrando cuánto tardó. Retorna el módulo."""
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nombre)
+    tardo = time.perf_counter() - inicio
+    with _lock:
+        # Un segundo import del mismo módulo es instantáneo: conservar el primero
+        IMPORT_TIMES.setdefault(nombre, round(tardo, 3))
+    print(f"⏱️ {nombre} importado en {tardo:.2f}s")
+    return modulo
+
+
+def marcar(evento):
+    """Registra un hito del arranque (segundos desde que empezó el proceso)."""
+    with _lock:
+        EVENTS.setdefault(evento, round(time.time() - PROCESS_START, 3))
+
+
+def stats():
+    with _lock:
+        return {
+            "import_seconds": dict(sorted(IMPORT_TIMES.items(), key=lambda kv: -kv[1])),
+            "events": dict(EVENTS),
+        }
@@ -0,0 +1,144 @@
+"""
+strategy_health.py - Salud por estrategia de descarga y orden adaptativo.
+
+Instagram se baja con varias estrategias (API web, instaloader, yt-dlp) que se
+probaban siempre en el mismo orden. Cuando el sessionid vence, las dos primeras
+fallan en cada pedido y cada descarga pagaba esos dos viajes de ida y vuelta
+antes de llegar a la que funciona.
+
+Acá se lleva una ventana de los últimos resultados de cada estrategia (tasa de
+éxito, latencia p50/p95) y un circuit breaker: tras N fallos seguidos la
+estrategia se saltea durante un enfriamiento, y después se deja pasar un solo
+intento de prueba ("half-open") para ver si se recuperó.
+"""
+import threading
+import time
+from collections import deque
+
+from services import metrics
+
+TRACKERS = metrics.Registro()
+
+# Por debajo de estas muestras no se reordena: el orden por defecto manda
+_MIN_MUESTRAS = 5
+# Si el intento de prueba nunca se registra (otra estrategia anterior ganó), se
+# libera después de esto para que otro trabajo pueda probar
+_PRUEBA_MAX_SEGUNDOS = 120
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    i = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[i]
+
+
+class _Estado:
+    __slots__ = ("resultados", "fallos_seguidos", "abierto_hasta", "probando", "aperturas", "salteos")
+
+    def __init__(self, window):
+        self.resultados = deque(maxlen=window)     # (ok, segundos)
+        self.fallos_seguidos = 0
+        self.abierto_hasta = 0.0
+        self.probando = 0.0
+        self.aperturas = 0
+        self.salteos = 0
+
+    def tasa_exito(self):
+        # Suavizado de Laplace: sin datos vale 0.5 y una sola muestra no la lleva a 0 ni a 1
+        ok = sum(1 for r, _ in self.resultados if r)
+        return (ok + 1) / (len(self.resultados) + 2)
+
+
+class StrategyHealth:
+    """`order(estrategias)` devuelve las estrategias a probar, mejores primero y
+    sin las que tienen el circuito abierto. `record()` alimenta el historial."""
+
+    def __init__(self, name, window=20, failure_threshold=3, cooldown_seconds=300):
+        self.name = name
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown_seconds
+        self._lock = threading.Lock()
+        self._estados = {}
+        TRACKERS.agregar(name, self)
+
+    def _estado(self, estrategia):
+        estado = self._estados.get(estrategia)
+        if estado is None:
+            estado = self._estados[estrategia] = _Estado(self.window)
+        return estado
+
+    def order(self, estrategias):
+        """Estrategias en el orden a probar. `estrategias` viene en el orden por
+        defecto, que desempata. Nunca devuelve una lista vacía: si todas tienen el
+        circuito abierto se prueban igual en el orden por defecto."""
+        ahora = time.time()
+        with self._lock:
+            candidatas = []
+            for i, nombre in enumerate(estrategias):
+                estado = self._estado(nombre)
+                if estado.abierto_hasta > ahora or ahora - estado.probando < _PRUEBA_MAX_SEGUNDOS:
+                    estado.salteos += 1
+                    continue
+                if estado.abierto_hasta:
+                    # Enfriamiento cumplido: un solo intento de prueba a la vez, y
+                    # en su lugar por defecto (su historial es todo fallos)
+                    estado.probando = ahora
+                    candidatas.append((-0.5, i, nombre))
+                elif len(estado.resultados) >= _MIN_MUESTRAS:
+                    candidatas.append((-estado.tasa_exito(), i, nombre))
+                else:
+                    candidatas.append((-0.5, i, nombre))
+        if not candidatas:
+            return list(estrategias)
+        return [nombre for _, _, nombre in sorted(candidatas)]
+
+    def record(self, estrategia, ok, segundos):
+        with self._lock:
+            estado = self._estado(estrategia)
+            estado.resultados.append((ok, segundos))
+            estado.probando = 0.0
+            if ok:
+                estado.fallos_seguidos = 0
+                estado.abierto_hasta = 0.0
+                return
+            estado.fallos_seguidos += 1
+            if estado.abierto_hasta or estado.fallos_seguidos >= self.failure_threshold:
+                # Falló la prueba half-open, o se llegó al umbral: (re)abrir el circuito
+                if not estado.abierto_hasta:
+                    estado.aperturas += 1
+                estado.abierto_hasta = time.time() + self.cooldown
+        if estado.abierto_hasta > time.time():
+            print(f"🔌 {self.name}: circuito abierto para '{estrategia}' por {self.cooldown}s "
+                  f"({estado.fallos_seguidos} fallos seguidos)")
+
+    def stats(self):
+        ahora = time.time()
+        with self._lock:
+            salida = {}
+            for nombre, estado in self._estados.items():
+                latencias = [s for _, s in estado.resultados]
+                if estado.abierto_hasta > ahora:
+                    circuito = "open"
+                elif estado.abierto_hasta:
+                    circuito = "half_open"
+                else:
+                    circuito = "closed"
+                salida[nombre] = {
+                    "samples": len(estado.resultados),
+                    "success_rate": round(sum(1 for r, _ in estado.resultados if r)
+                                          / len(estado.resultados), 3) if estado.resultados else None,
+                    "p50_seconds": round(_percentil(latencias, 50), 2) if latencias else None,
+                    "p95_seconds": round(_percentil(latencias, 95), 2) if latencias else None,
+                    "consecutive_failures": estado.fallos_seguidos,
+                    "circuit": circuito,
+                    "reopens_in_seconds": round(estado.abierto_hasta - ahora) if circuito == "open" else 0,
+                    "opened": estado.aperturas,
+                    "skipped": estado.salteos,
+                }
+            return salida
+
+
+stats = TRACKERS.stats
@@ -0,0 +1,136 @@
+"""
+telegram_upload.py - Subidas multipart en streaming a la Bot API de Telegram.
+
+telebot arma el cuerpo multipart entero en memoria (requests lee cada archivo
+completo), así que un media group de 40 MB costaba 40+ MB de RSS por cada subida
+concurrente. Acá el cuerpo se genera al vuelo leyendo del disco en bloques: el
+pico de memoria por subida queda constante sin importar el peso de los archivos.
+
+Se usa la misma API_URL y proxy que telebot, y la respuesta se devuelve como el
+JSON crudo de Telegram (dict / lista de dicts de Message).
+"""
+import json
+import mimetypes
+import os
+import secrets
+
+import requests
+from telebot import apihelper
+
+# Tamaño de cada bloque leído del disco y enviado al socket
+CHUNK_SIZE = 256 * 1024
+
+
+class TelegramError(RuntimeError):
+    """La Bot API respondió ok=false. En un 429 (flood control) `retry_after`
+    trae los segundos que pide Telegram antes de volver a intentar."""
+
+    def __init__(self, metodo, error_code, description, retry_after=None):
+        super().__init__(f"Telegram {metodo}: {error_code} {description}")
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+
+class MultipartStream:
+    """Cuerpo multipart/form-data que se lee por partes.
+
+    Tiene __len__ (requests manda Content-Length en vez de chunked, que la Bot API
+    no siempre acepta) y __iter__ (requests lo trata como stream y urllib3 manda
+    cada bloque tal cual sale del disco). Sin read(): urllib3 lo preferiría y
+    pediría bloques de 16 KB, que habría que recortar de los de CHUNK_SIZE."""
+
+    def __init__(self, campos, archivos):
+        """campos: {nombre: valor}. archivos: [(nombre_campo, ruta)]."""
+        self.boundary = secrets.token_hex(16)
+        self._partes = []
+        for nombre, valor in campos.items():
+            self._partes.append(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{nombre}"\r\n\r\n'
+                f'{valor}\r\n'.encode('utf-8')
+            )
+        for nombre, ruta in archivos:
+            tipo = mimetypes.guess_type(ruta)[0] or 'application/octet-stream'
+            self._partes.append(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{nombre}"; '
+                f'filename="{os.path.basename(ruta)}"\r\n'
+                f'Content-Type: {tipo}\r\n\r\n'.encode('utf-8')
+            )
+            self._partes.append(ruta)
+            self._partes.append(b'\r\n')
+        self._partes.append(f'--{self.boundary}--\r\n'.encode('utf-8'))
+        self._len = sum(os.path.getsize(p) if isinstance(p, str) else len(p) for p in self._partes)
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for parte in self._partes:
+            if isinstance(parte, bytes):
+                yield parte
+                continue
+            with open(parte, 'rb') as f:
+                while True:
+                    bloque = f.read(CHUNK_SIZE)
+                    if not bloque:
+                        break
+                    yield bloque
+
+
+def enviar_multipart(token, metodo, campos, archivos, timeout):
+    """Llama a `metodo` de la Bot API subiendo `archivos` en streaming.
+    Retorna el `result` de Telegram o lanza TelegramError si la API responde error."""
+    cuerpo = MultipartStream(campos, archivos)
+    # Igual que telebot: API_URL es None salvo que se configure un servidor propio
+    url = (apihelper.API_URL or "https://api.telegram.org/bot{0}/{1}").format(token, metodo)
+    r = requests.post(
+        url, data=cuerpo,
+        headers={'Content-Type': cuerpo.content_type},
+        timeout=(apihelper.CONNECT_TIMEOUT, timeout),
+        proxies=apihelper.proxy,
+    )
+    try:
+        respuesta = r.json()
+    except ValueError:
+        raise RuntimeError(f"Telegram {metodo}: HTTP {r.status_code} {r.text[:150]}")
+    if not respuesta.get('ok'):
+        raise TelegramError(metodo, respuesta.get('error_code'), respuesta.get('description'),
+                            (respuesta.get('parameters') or {}).get('retry_after'))
+    return respuesta['result']
+
+
+# Lo que sale del comando /audio (FFmpegExtractAudio sin re-encodear)
+EXTENSIONES_AUDIO = ('.m4a', '.mp3', '.opus', '.ogg', '.aac', '.flac', '.wav')
+
+
+def send_media_file(token, chat_id, ruta, timeout):
+    """sendVideo / sendAudio / sendPhoto según la extensión, en streaming."""
+    if ruta.lower().endswith('.mp4'):
+        metodo, campo, extra = 'sendVideo', 'video', {'supports_streaming': 'true'}
+    elif ruta.lower().endswith(EXTENSIONES_AUDIO):
+        metodo, campo, extra = 'sendAudio', 'audio', {}
+    else:
+        metodo, campo, extra = 'sendPhoto', 'photo', {}
+    return enviar_multipart(token, metodo, {'chat_id': chat_id, **extra}, [(campo, ruta)], timeout)
+
+
+def send_media_group(token, chat_id, rutas, timeout):
+    """sendMediaGroup con los archivos adjuntos como attach://fileN."""
+    media, archivos = [], []
+    for i, ruta in enumerate(rutas):
+        nombre = f'file{i}'
+        if ruta.lower().endswith('.mp4'):
+            media.append({'type': 'video', 'media': f'attach://{nombre}', 'supports_streaming': True})
+        elif ruta.lower().endswith(EXTENSIONES_AUDIO):
+            # Un media group de audios no se puede mezclar con fotos/videos
+            media.append({'type': 'audio', 'media': f'attach://{nombre}'})
+        else:
+            media.append({'type': 'photo', 'media': f'attach://{nombre}'})
+        archivos.append((nombre, ruta))
+    campos = {'chat_id': chat_id, 'media': json.dumps(media)}
+    return enviar_multipart(token, 'sendMediaGroup', campos, archivos, timeout)
@@ -0,0 +1,136 @@
+"""
+video_reencode.py - Re-encode de videos a un tamaño objetivo con ffmpeg.
+
+Cuando ningún formato del video entra en el límite de subida de Telegram, en vez
+de responder "supera el límite" se baja el formato más liviano y se re-encodea con
+un bitrate calculado a partir de la duración y el peso objetivo. La salida lleva
+`+faststart` (moov al inicio) para que Telegram la pueda reproducir en streaming.
+
+ffmpeg corre como proceso hijo con prioridad baja, pocos hilos y un tope de
+encodes simultáneos, para que no le robe la CPU a los hilos de polling de los bots.
+"""
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+from config import MONKEY_REENCODE_WORKERS, MONKEY_REENCODE_THREADS
+
+# Margen para el overhead del contenedor y la imprecisión del control de bitrate
+_MARGEN = 0.92
+# Por debajo de esto el video queda irreconocible: mejor no mandarlo
+_MIN_VIDEO_KBPS = 100
+
+_slots = threading.BoundedSemaphore(max(1, MONKEY_REENCODE_WORKERS))
+
+STATS = {
+    "encodes": 0,
+    "failed": 0,
+    "media_seconds": 0.0,
+    "encode_seconds": 0.0,
+}
+
+
+def ffmpeg_exe():
+    """Binario de ffmpeg. Usa el que trae imageio-ffmpeg (sirve en Render nativo)."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def duracion_segundos(archivo):
+    """Duración del video leyendo la cabecera con `ffmpeg -i` (no decodifica nada)."""
+    try:
+        res = subprocess.run([ffmpeg_exe(), "-hide_banner", "-i", archivo],
+                             capture_output=True, text=True, timeout=30)
+    except Exception:
+        return None
+    m = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", res.stderr or "")
+    if not m:
+        return None
+    h, mnt, seg = m.groups()
+    return int(h) * 3600 + int(mnt) * 60 + float(seg)
+
+
+def _con_prioridad_baja(cmd):
+    """Antepone `nice -n 10` al comando si el sistema lo tiene (en Windows no:
+    corre con prioridad normal). Sin preexec_fn, que no es seguro con hilos."""
+    nice = shutil.which("nice") if os.name == "posix" else None
+    return [nice, "-n", "10", *cmd] if nice else cmd
+
+
+def reencodar_a_tamano(archivo, limite_mb, duracion=None):
+    """Re-encodea `archivo` para que pese menos de `limite_mb`. Reemplaza el
+    archivo original y retorna True, o retorna False si no se pudo (el original
+    queda intacto)."""
+    duracion = duracion or duracion_segundos(archivo)
+    if not duracion:
+        print(f"⚠️ Re-encode: no se pudo leer la duración de {archivo}")
+        return False
+
+    total_kbps = limite_mb * 1024 * 1024 * 8 * _MARGEN / duracion / 1000
+    audio_kbps = 96 if total_kbps > 500 else 64
+    video_kbps = int(total_kbps - audio_kbps)
+    if video_kbps < _MIN_VIDEO_KBPS:
+        print(f"⚠️ Re-encode: {duracion:.0f}s no entran en {limite_mb} MB "
+              f"(quedarían {video_kbps} kbps de video)")
+        return False
+
+    # Con poco bitrate, bajar la resolución se ve mejor que llenar 1080p de artefactos
+    altura = 1080 if video_kbps >= 2500 else 720 if video_kbps >= 900 else 480
+    salida = os.path.splitext(archivo)[0] + "_reenc.mp4"
+    cmd = [
+        ffmpeg_exe(), "-hide_banner", "-y", "-i", archivo,
+        "-vf", f"scale=-2:'min({altura},ih)'",
+        "-c:v", "libx264", "-preset", "veryfast",
+        "-b:v", f"{video_kbps}k", "-maxrate", f"{video_kbps}k", "-bufsize", f"{video_kbps * 2}k",
+        "-c:a", "aac", "-b:a", f"{audio_kbps}k",
+        "-movflags", "+faststart",
+        "-threads", str(MONKEY_REENCODE_THREADS),
+        salida,
+    ]
+    print(f"🎞️ Re-encode de {os.path.basename(archivo)}: {duracion:.0f}s → "
+          f"{video_kbps}k video + {audio_kbps}k audio, máx {altura}p")
+
+    with _slots:
+        inicio = time.time()
+        try:
+            subprocess.run(_con_prioridad_baja(cmd), check=True, capture_output=True,
+                           timeout=max(120, duracion * 4))
+        except Exception as e:
+            STATS["failed"] += 1
+            print(f"❌ Re-encode falló: {type(e).__name__}: {str(e)[:200]}")
+            try:
+                os.remove(salida)
+            except OSError:
+                pass
+            return False
+        tardo = time.time() - inicio
+
+    STATS["encodes"] += 1
+    STATS["media_seconds"] += duracion
+    STATS["encode_seconds"] += tardo
+    peso_mb = os.path.getsize(salida) / (1024 * 1024)
+    print(f"✅ Re-encode listo en {tardo:.1f}s ({tardo / (duracion / 60):.1f}s por minuto de video), "
+          f"{peso_mb:.1f} MB")
+
+    if peso_mb > limite_mb:
+        print(f"⚠️ Re-encode quedó en {peso_mb:.1f} MB, sigue sobre el límite")
+        os.remove(salida)
+        return False
+    os.replace(salida, archivo)
+    return True
+
+
+def stats():
+    minutos = STATS["media_seconds"] / 60
+    return {
+        **STATS,
+        "encode_seconds_per_video_minute": round(STATS["encode_seconds"] / minutos, 2) if minutos else None,
+        "workers": MONKEY_REENCODE_WORKERS,
+        "threads_per_encode": MONKEY_REENCODE_THREADS,
+    }
@@ -0,0 +1,253 @@
+"""
+ydl_pool.py - Instancias de yt_dlp.YoutubeDL reutilizables, una familia por perfil de opciones.
+
+Cada descarga armaba un YoutubeDL nuevo (y el sondeo otro más): releía el
+archivo de cookies, volvía a instanciar los extractores, a armar el opener HTTP
+y perdía lo que los extractores cachean entre usos (p.ej. el player de YouTube).
+
+Cada YdlPool presta instancias de larga vida de un perfil (YDL_OPTS,
+YDL_OPTS_TWITTER, ...) a un solo hilo a la vez. Al prestarla se restauran los
+params del perfil y se aplican los del trabajo (format, outtmpl, hooks...):
+como YoutubeDL arma el selector de formato, las plantillas y las listas de
+hooks en su __init__, esas piezas se rehacen a mano. Si la versión de yt-dlp
+no tiene esos internos, o el trabajo cambia algo que solo se lee al construir
+(cookiefile, postprocessors...), se usa una instancia nueva como antes. Lo
+mismo si están todas prestadas: nunca se espera a que se libere una.
+
+Cuando cambian las cookies del perfil (CookieSource.version) las instancias
+viejas se descartan. calentar() crea una por perfil en segundo plano al
+arrancar, con sus extractores principales ya cargados. stats() muestra cuánto
+cuesta preparar una instancia nueva contra una reutilizada.
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from config import MONKEY_YDL_POOL_SIZE
+from services import metrics
+
+POOLS = metrics.Registro()
+
+# Params que YoutubeDL solo lee al construirse: si un trabajo los cambia, la
+# instancia del pool no sirve
+_CLAVES_DE_CONSTRUCCION = ('cookiefile', 'cookiesfrombrowser', 'postprocessors', 'proxy',
+                           'source_address', 'http_headers', 'logger', 'verbose')
+
+
+def _ms(segundos):
+    return round(segundos * 1000, 1)
+
+
+class YdlPool:
+    """`with pool.prestado(**cambios) as ydl:` presta un YoutubeDL con los params
+    del perfil más `cambios`. No usar la instancia fuera del `with`."""
+
+    def __init__(self, name, opciones, cookies=None, extractores=(), size=MONKEY_YDL_POOL_SIZE):
+        self.name = name
+        self.opciones = opciones
+        self.cookies = cookies
+        self.extractores = extractores
+        self.size = size
+        self._libres = queue.LifoQueue()
+        self._creados = 0
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "reused": 0, "bypassed": 0, "exhausted": 0, "discarded": 0,
+                       "setup_new_seconds": 0.0, "setup_reused_seconds": 0.0}
+        POOLS.agregar(name, self)
+
+    # ---- API pública ----
+    @contextmanager
+    def prestado(self, **cambios):
+        inicio = time.perf_counter()
+        version = self._version_cookies()
+        if self.size <= 0 or any(k in cambios for k in _CLAVES_DE_CONSTRUCCION):
+            with self._de_un_uso(version, cambios, inicio) as ydl:
+                yield ydl
+            return
+
+        ydl, nueva = self._tomar(version)
+        if ydl is None:
+            # Todas prestadas: una de un solo uso, como antes del pool, en vez
+            # de esperar a que termine una descarga entera
+            with self._lock:
+                self._stats["exhausted"] += 1
+            with self._de_un_uso(version, cambios, inicio) as ydl:
+                yield ydl
+            return
+        try:
+            preparada = (nueva and not cambios) or self._preparar(ydl, cambios)
+        except Exception:
+            self._descartar(ydl)
+            raise
+        if preparada:
+            self._medir("created" if nueva else "reused",
+                        "setup_new_seconds" if nueva else "setup_reused_seconds", inicio)
+            # Aunque la descarga falle se devuelve: _preparar resetea lo del trabajo
+            try:
+                yield ydl
+            finally:
+                self._libres.put(ydl)
+            return
+
+        # Esta versión de yt-dlp no se deja reconfigurar: una por trabajo
+        self._descartar(ydl)
+        with self._de_un_uso(version, cambios, inicio) as ydl:
+            yield ydl
+
+    def calentar(self):
+        """Deja una instancia lista en el pool (con los extractores cargados)."""
+        if self.size <= 0:
+            return
+        with self.prestado() as ydl:
+            for clave in self.extractores:
+                try:
+                    ydl.get_info_extractor(clave)
+                except Exception as e:
+                    print(f"⚠️ yt-dlp {self.name}: no se pudo precargar el extractor {clave}: {e}")
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            creados = self._creados
+        nuevas = s["created"] + s["bypassed"]
+        return {
+            "created": s["created"],
+            "reused": s["reused"],
+            "bypassed": s["bypassed"],
+            "exhausted": s["exhausted"],
+            "discarded": s["discarded"],
+            "instances": creados,
+            "idle": self._libres.qsize(),
+            "size": self.size,
+            "avg_setup_new_ms": _ms(s["setup_new_seconds"] / nuevas) if nuevas else None,
+            "avg_setup_reused_ms": _ms(s["setup_reused_seconds"] / s["reused"]) if s["reused"] else None,
+        }
+
+    # ---- Internos ----
+    def _version_cookies(self):
+        if self.cookies is None:
+            return None
+        self.cookies.refresh()
+        return self.cookies.version
+
+    def _params(self):
+        params = dict(self.opciones)
+        cookiefile = self.cookies.cookiefile() if self.cookies is not None else None
+        if cookiefile:
+            params['cookiefile'] = cookiefile
+        return params
+
+    def _nueva(self, version, cambios=None):
+        import yt_dlp
+        ydl = yt_dlp.YoutubeDL({**self._params(), **(cambios or {})})
+        ydl._monkey_cookies_version = version
+        # Params ya normalizados por __init__: lo que se restaura en cada préstamo
+        ydl._monkey_base = dict(ydl.params)
+        # Hooks propios de cada postprocesador (report_progress), sin los del perfil
+        de_perfil = getattr(ydl, '_postprocessor_hooks', [])
+        for pp in _postprocesadores(ydl):
+            if hasattr(pp, '_progress_hooks'):
+                pp._monkey_hooks = [h for h in pp._progress_hooks if h not in de_perfil]
+        return ydl
+
+    @contextmanager
+    def _de_un_uso(self, version, cambios, inicio):
+        """Instancia fuera del pool: se crea para este trabajo y se cierra al salir."""
+        ydl = self._nueva(version, cambios)
+        self._medir("bypassed", "setup_new_seconds", inicio)
+        try:
+            yield ydl
+        finally:
+            self._cerrar(ydl)
+
+    def _tomar(self, version):
+        """(instancia, es_nueva): una libre con las cookies al día, o una nueva
+        si hay lugar. (None, False) si están todas prestadas."""
+        while True:
+            try:
+                ydl = self._libres.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    hay_lugar = self._creados < self.size
+                    if hay_lugar:
+                        self._creados += 1
+                if not hay_lugar:
+                    return None, False
+                try:
+                    return self._nueva(version), True
+                except Exception:
+                    with self._lock:
+                        self._creados -= 1
+                    raise
+            if ydl._monkey_cookies_version == version:
+                return ydl, False
+            # Cookies nuevas: la instancia tiene el jar viejo cargado
+            self._descartar(ydl)
+
+    def _preparar(self, ydl, cambios):
+        """Deja `ydl` con los params del perfil más `cambios`. False si esta
+        versión de yt-dlp no tiene los internos que hay que rehacer."""
+        if not all(hasattr(ydl, a) for a in ('_progress_hooks', '_postprocessor_hooks', '_parse_outtmpl')):
+            return False
+        if not all(hasattr(pp, '_monkey_hooks') for pp in _postprocesadores(ydl)):
+            return False
+        params = {**ydl._monkey_base, **cambios}
+        ydl.params.clear()
+        ydl.params.update(params)
+        ydl._parse_outtmpl()
+        formato = params.get('format')
+        ydl.format_selector = (formato if formato in (None, '-') or callable(formato)
+                               else ydl.build_format_selector(formato))
+        ydl._progress_hooks = []
+        ydl._postprocessor_hooks = []
+        # add_postprocessor_hook también los cuelga de cada postprocesador
+        for pp in _postprocesadores(ydl):
+            pp._progress_hooks = list(pp._monkey_hooks)
+        for hook in params.get('progress_hooks') or []:
+            ydl.add_progress_hook(hook)
+        for hook in params.get('postprocessor_hooks') or []:
+            ydl.add_postprocessor_hook(hook)
+        ydl._num_downloads = 0
+        return True
+
+    def _descartar(self, ydl):
+        with self._lock:
+            self._creados -= 1
+            self._stats["discarded"] += 1
+        self._cerrar(ydl)
+
+    def _cerrar(self, ydl):
+        # close() guarda el cookiejar en `cookiefile`: el de una instancia vieja
+        # pisaría el archivo que CookieSource acaba de reescribir
+        ydl.params.pop('cookiefile', None)
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+    def _medir(self, contador, tiempo, inicio):
+        with self._lock:
+            self._stats[contador] += 1
+            self._stats[tiempo] += time.perf_counter() - inicio
+
+
+def _postprocesadores(ydl):
+    return [pp for pps in getattr(ydl, '_pps', {}).values() for pp in pps]
+
+
+def calentar():
+    """Crea en segundo plano una instancia por perfil (el import de yt-dlp incluido)."""
+    def _calentar():
+        inicio = time.perf_counter()
+        for pool in list(POOLS.values()):
+            try:
+                pool.calentar()
+            except Exception as e:
+                print(f"⚠️ yt-dlp {pool.name}: no se pudo precalentar: {e}")
+        print(f"🔥 yt-dlp precalentado ({len(POOLS)} perfiles) en {time.perf_counter() - inicio:.2f}s")
+
+    threading.Thread(target=_calentar, name="ydl-warmup", daemon=True).start()
+
+
+stats = POOLS.stats
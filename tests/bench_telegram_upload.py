@@ -0,0 +1,115 @@
+"""
+bench_telegram_upload.py - Pico de RSS al subir un media group de 10 archivos (~40 MB).
+
+Compara el cuerpo multipart armado en memoria (requests con `files=`, que es lo
+que hace telebot) contra telegram_upload.MultipartStream, subiendo a un
+servidor HTTP local que descarta el cuerpo. Cada variante corre en un proceso
+aparte y reporta cuánto subió su pico de RSS (ru_maxrss) durante la subida.
+
+    python tests/bench_telegram_upload.py [--archivos 10] [--mb 4]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = "123:bench"
+
+
+class _Sumidero(BaseHTTPRequestHandler):
+    """Lee el cuerpo entero en bloques, lo descarta y responde como la Bot API."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        restante = int(self.headers.get('Content-Length') or 0)
+        while restante:
+            bloque = self.rfile.read(min(restante, 1024 * 1024))
+            if not bloque:
+                break
+            restante -= len(bloque)
+        cuerpo = json.dumps({"ok": True, "result": []}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+def _pico_rss_mb():
+    # Linux: ru_maxrss en KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _subir(modo, base_url, rutas):
+    """Corre en el proceso hijo: una sola subida y el aumento del pico de RSS."""
+    sys.path.insert(0, RAIZ)
+    import requests
+    from telebot import apihelper
+    from services import telegram_upload
+
+    apihelper.API_URL = base_url + "/bot{0}/{1}"
+    antes = _pico_rss_mb()
+    if modo == "memoria":
+        media = [{'type': 'video', 'media': f'attach://file{i}'} for i in range(len(rutas))]
+        archivos = {f'file{i}': open(ruta, 'rb') for i, ruta in enumerate(rutas)}
+        try:
+            r = requests.post(apihelper.API_URL.format(TOKEN, 'sendMediaGroup'),
+                              data={'chat_id': 1, 'media': json.dumps(media)}, files=archivos)
+            r.raise_for_status()
+        finally:
+            for f in archivos.values():
+                f.close()
+    else:
+        telegram_upload.send_media_group(TOKEN, 1, rutas, timeout=60)
+    print(json.dumps({"modo": modo, "antes_mb": antes, "pico_mb": _pico_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--archivos', type=int, default=10)
+    parser.add_argument('--mb', type=float, default=4)
+    parser.add_argument('--hijo', nargs=2, metavar=('MODO', 'URL'), help=argparse.SUPPRESS)
+    parser.add_argument('rutas', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        _subir(args.hijo[0], args.hijo[1], args.rutas)
+        return
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Sumidero)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = []
+        for i in range(args.archivos):
+            ruta = os.path.join(carpeta, f"video_{i}.mp4")
+            with open(ruta, 'wb') as f:
+                f.write(os.urandom(int(args.mb * 1024 * 1024)))
+            rutas.append(ruta)
+        total_mb = args.archivos * args.mb
+        print(f"Media group de {args.archivos} archivos, {total_mb:.0f} MB en total\n")
+        print(f"{'modo':<10} {'RSS antes':>10} {'pico':>10} {'aumento':>10}")
+        for modo in ("memoria", "streaming"):
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--hijo', modo, base_url, *rutas],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(salida.strip().splitlines()[-1])
+            print(f"{modo:<10} {r['antes_mb']:>8.1f}MB {r['pico_mb']:>8.1f}MB "
+                  f"{r['pico_mb'] - r['antes_mb']:>8.1f}MB")
+
+    servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+bench_video_reencode.py - Segundos de encode por minuto de video, antes y ahora.
+
+Genera un clip de prueba con `testsrc` (video) y `sine` (audio) y lo re-encodea
+al bitrate que calcularía video_reencode.reencodar_a_tamano para el límite dado,
+con dos configuraciones:
+
+    antes   libx264 con su preset por defecto (medium), todos los hilos que
+            quiera ffmpeg y prioridad normal
+    ahora   la de video_reencode: -preset veryfast, -threads N y nice -n 10
+
+Reporta, por minuto de video, los segundos de reloj y los de CPU (usuario +
+sistema del ffmpeg hijo), que es lo que se le quita a los hilos de los bots.
+
+    python tests/bench_video_reencode.py [--segundos 30] [--altura 1080] [--limite-mb 20] [--threads 1]
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+# Mismo margen que services/video_reencode.py
+_MARGEN = 0.92
+
+
+def _ffmpeg():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def _generar_clip(ruta, segundos, altura):
+    ancho = altura * 16 // 9
+    subprocess.run([
+        _ffmpeg(), "-hide_banner", "-y",
+        "-f", "lavfi", "-i", f"testsrc=duration={segundos}:size={ancho}x{altura}:rate=30",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={segundos}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "18",
+        "-c:a", "aac", "-shortest", ruta,
+    ], check=True, capture_output=True)
+
+
+def _bitrates(segundos, limite_mb):
+    total_kbps = limite_mb * 1024 * 1024 * 8 * _MARGEN / segundos / 1000
+    audio_kbps = 96 if total_kbps > 500 else 64
+    video_kbps = int(total_kbps - audio_kbps)
+    altura = 1080 if video_kbps >= 2500 else 720 if video_kbps >= 900 else 480
+    return video_kbps, audio_kbps, altura
+
+
+def _comando(modo, entrada, salida, video_kbps, audio_kbps, altura, threads):
+    ahora = modo == "ahora"
+    cmd = [
+        _ffmpeg(), "-hide_banner", "-y", "-i", entrada,
+        "-vf", f"scale=-2:'min({altura},ih)'",
+        "-c:v", "libx264", *(["-preset", "veryfast"] if ahora else []),
+        "-b:v", f"{video_kbps}k", "-maxrate", f"{video_kbps}k", "-bufsize", f"{video_kbps * 2}k",
+        "-c:a", "aac", "-b:a", f"{audio_kbps}k",
+        "-movflags", "+faststart",
+    ]
+    if ahora:
+        cmd += ["-threads", str(threads)]
+        nice = shutil.which("nice") if os.name == "posix" else None
+        if nice:
+            cmd = [nice, "-n", "10", *cmd]
+    return cmd + [salida]
+
+
+def _cpu_hijos():
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return uso.ru_utime + uso.ru_stime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--segundos', type=int, default=30)
+    parser.add_argument('--altura', type=int, default=1080)
+    parser.add_argument('--limite-mb', type=float, default=20)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+
+    video_kbps, audio_kbps, altura = _bitrates(args.segundos, args.limite_mb)
+    minutos = args.segundos / 60
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        entrada = os.path.join(carpeta, "clip.mp4")
+        _generar_clip(entrada, args.segundos, args.altura)
+        print(f"Clip testsrc de {args.segundos}s a {args.altura}p → {video_kbps}k video + "
+              f"{audio_kbps}k audio, máx {altura}p (límite {args.limite_mb:g} MB), "
+              f"{os.cpu_count()} CPUs\n")
+        print(f"{'modo':<8} {'reloj/min':>10} {'CPU/min':>10} {'salida':>10}")
+        for modo in ("antes", "ahora"):
+            salida = os.path.join(carpeta, f"{modo}.mp4")
+            cmd = _comando(modo, entrada, salida, video_kbps, audio_kbps, altura, args.threads)
+            cpu_antes = _cpu_hijos()
+            inicio = time.perf_counter()
+            subprocess.run(cmd, check=True, capture_output=True)
+            reloj = time.perf_counter() - inicio
+            cpu = _cpu_hijos() - cpu_antes
+            peso_mb = os.path.getsize(salida) / (1024 * 1024)
+            print(f"{modo:<8} {reloj / minutos:>9.1f}s {cpu / minutos:>9.1f}s {peso_mb:>8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
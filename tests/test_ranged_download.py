@@ -0,0 +1,161 @@
+"""
+test_ranged_download.py - services/ranged_download contra un http.server local
+que corta las respuestas a mitad de camino.
+"""
+import os
+import re
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from services import ranged_download
+
+BLOQUE = ranged_download.CHUNK_SIZE
+ORIGEN = os.urandom(4 * BLOQUE + 123)
+ETAG = '"v1"'
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.corte = None          # bytes que se mandan antes de cortar
+        self.cortes = None         # cuántas respuestas se cortan (None = todas)
+        self.acepta_rangos = True
+        self.pedidos = []          # (Range, If-Range) de cada GET
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/reel.mp4"
+
+    def toca_cortar(self, largo):
+        with self.lock:
+            if self.corte is None or largo <= self.corte or self.cortes == 0:
+                return False
+            if self.cortes is not None:
+                self.cortes -= 1
+            return True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        rango = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        with srv.lock:
+            srv.pedidos.append((rango, if_range))
+
+        m = re.match(r'bytes=(\d+)-(\d*)$', rango or '')
+        if srv.acepta_rangos and m and if_range in (None, ETAG):
+            inicio = int(m.group(1))
+            fin = int(m.group(2)) if m.group(2) else len(ORIGEN) - 1
+            if inicio >= len(ORIGEN):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(ORIGEN)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            cuerpo = ORIGEN[inicio:fin + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {inicio}-{fin}/{len(ORIGEN)}')
+        else:
+            cuerpo = ORIGEN
+            self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Accept-Ranges', 'bytes' if srv.acepta_rangos else 'none')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+
+        if srv.toca_cortar(len(cuerpo)):
+            self.wfile.write(cuerpo[:srv.corte])
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+            return
+        self.wfile.write(cuerpo)
+
+
+@pytest.fixture
+def servidor():
+    srv = _Servidor()
+    hilo = threading.Thread(target=srv.serve_forever, daemon=True)
+    hilo.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture(autouse=True)
+def sin_esperas(monkeypatch):
+    monkeypatch.setattr(ranged_download.time, 'sleep', lambda _s: None)
+
+
+def _delta(antes):
+    return {k: ranged_download.STATS[k] - v for k, v in antes.items()}
+
+
+def _bajar(servidor, tmp_path, **kwargs):
+    destino = tmp_path / 'reel.mp4'
+    with requests.Session() as session:
+        ranged_download.descargar(session, servidor.url, str(destino), timeout=10, **kwargs)
+    return destino.read_bytes()
+
+
+# Los cortes caen en múltiplos de CHUNK_SIZE: un bloque a medio leer cuando se
+# corta la conexión se pierde y se vuelve a pedir.
+def test_retoma_con_range_e_if_range(servidor, tmp_path):
+    servidor.corte = 2 * BLOQUE
+    antes = dict(ranged_download.STATS)
+
+    assert _bajar(servidor, tmp_path, segmentos=1) == ORIGEN
+
+    rangos = [r for r, _ in servidor.pedidos]
+    assert rangos == [None, f'bytes={2 * BLOQUE}-', f'bytes={4 * BLOQUE}-']
+    assert all(ir == ETAG for _, ir in servidor.pedidos[1:])
+    delta = _delta(antes)
+    assert delta['resumes'] == 2
+    assert delta['resumed_bytes'] == 2 * BLOQUE + 4 * BLOQUE
+    assert delta['restarted'] == 0
+
+
+def test_reinicia_si_el_servidor_ignora_range(servidor, tmp_path):
+    servidor.corte = 2 * BLOQUE
+    servidor.cortes = 1
+    servidor.acepta_rangos = False
+    antes = dict(ranged_download.STATS)
+
+    assert _bajar(servidor, tmp_path, segmentos=1) == ORIGEN
+
+    assert [r for r, _ in servidor.pedidos] == [None, f'bytes={2 * BLOQUE}-']
+    delta = _delta(antes)
+    assert delta['restarted'] == 1
+    assert delta['resumes'] == 0
+
+
+def test_segmentos_en_paralelo(servidor, tmp_path, monkeypatch):
+    monkeypatch.setattr(ranged_download, 'MONKEY_HTTP_SEGMENT_MIN_MB', 0)
+    servidor.corte = BLOQUE
+    antes = dict(ranged_download.STATS)
+
+    assert _bajar(servidor, tmp_path, segmentos=3) == ORIGEN
+
+    rangos = [r for r, _ in servidor.pedidos]
+    assert rangos[0] == 'bytes=0-0'
+    tramo = -(-len(ORIGEN) // 3)
+    for inicio in range(0, len(ORIGEN), tramo):
+        fin = min(inicio + tramo, len(ORIGEN)) - 1
+        assert f'bytes={inicio}-{fin}' in rangos
+        assert f'bytes={inicio + BLOQUE}-{fin}' in rangos
+    delta = _delta(antes)
+    assert delta['segmented'] == 1
+    assert delta['resumes'] == 3